@@ -0,0 +1,111 @@
+"""Process-level cache of the active business hours configuration.
+
+Punches check late/early flags against the active BusinessHours on every
+request, so the configuration is loaded once per process and the Chicago
+local thresholds are computed once per calendar date. Saving or deleting a
+BusinessHours row bumps a generation counter in Django's cache framework so
+other processes drop their copy as well; BUSINESS_HOURS_CACHE_TTL bounds how
+long a process can serve a stale copy when the cache is not shared.
+"""
+import threading
+from datetime import datetime, timedelta
+from time import monotonic
+
+import pytz
+from django.conf import settings
+from django.core.cache import cache
+
+from timetracking.local_calendar import CENTRAL_TZ
+
+GENERATION_KEY = 'business_hours:generation'
+
+# Per-date thresholds kept before the memo is reset
+MAX_CACHED_DATES = 366
+
+_lock = threading.Lock()
+_schedule = None
+_loaded_generation = None
+_loaded_at = 0.0
+
+
+class BusinessSchedule:
+    """Active business hours with Chicago local thresholds memoized per date"""
+
+    def __init__(self, business_hours):
+        self.business_hours = business_hours
+        self._late_thresholds = {}
+        self._scheduled_ends = {}
+
+    def _to_chicago_time(self, local_date, utc_time):
+        # Business hours are stored as UTC times of day
+        utc_dt = datetime.combine(local_date, utc_time).replace(tzinfo=pytz.utc)
+        return utc_dt.astimezone(CENTRAL_TZ).time()
+
+    def late_threshold(self, local_date):
+        """Latest on-time punch in (Chicago time of day) for a date"""
+        threshold = self._late_thresholds.get(local_date)
+        if threshold is None:
+            if len(self._late_thresholds) >= MAX_CACHED_DATES:
+                self._late_thresholds.clear()
+            start_time = self._to_chicago_time(local_date, self.business_hours.start_time)
+            threshold = (
+                datetime.combine(local_date, start_time) +
+                timedelta(minutes=self.business_hours.late_threshold)
+            ).time()
+            self._late_thresholds[local_date] = threshold
+        return threshold
+
+    def scheduled_end(self, local_date):
+        """Scheduled end of day (Chicago time of day) for a date"""
+        end_time = self._scheduled_ends.get(local_date)
+        if end_time is None:
+            if len(self._scheduled_ends) >= MAX_CACHED_DATES:
+                self._scheduled_ends.clear()
+            end_time = self._to_chicago_time(local_date, self.business_hours.end_time)
+            self._scheduled_ends[local_date] = end_time
+        return end_time
+
+    def is_late(self, local_timestamp, entry_type):
+        """Check if a Chicago local entry is a late punch in"""
+        if entry_type != 'punch_in' or not self.business_hours:
+            return False
+        return local_timestamp.time() > self.late_threshold(local_timestamp.date())
+
+    def is_early(self, local_timestamp, entry_type):
+        """Check if a Chicago local entry is an early punch out"""
+        if entry_type != 'punch_out' or not self.business_hours:
+            return False
+        return local_timestamp.time() < self.scheduled_end(local_timestamp.date())
+
+
+def get_business_schedule():
+    """Return the cached schedule for the active business hours"""
+    global _schedule, _loaded_generation, _loaded_at
+
+    generation = cache.get(GENERATION_KEY, 0)
+    schedule = _schedule
+    if (
+        schedule is not None
+        and _loaded_generation == generation
+        and monotonic() - _loaded_at < settings.BUSINESS_HOURS_CACHE_TTL
+    ):
+        return schedule
+
+    from .models import BusinessHours
+
+    with _lock:
+        schedule = BusinessSchedule(BusinessHours.get_current())
+        _schedule, _loaded_generation, _loaded_at = schedule, generation, monotonic()
+    return schedule
+
+
+def invalidate_business_schedule():
+    """Drop the cached schedule in this and every other process"""
+    global _schedule
+
+    with _lock:
+        _schedule = None
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
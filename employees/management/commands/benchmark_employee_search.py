@@ -0,0 +1,90 @@
+import random
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from employees.models import Employee
+from employees.search import email_lookup, search_employees
+
+SEARCH_PREFIX = 'SRCH-'
+
+FIRST_NAMES = ['Anna', 'Bruno', 'Chen', 'Dalia', 'Emeka', 'Farah', 'Goran', 'Hana', 'Ivan', 'Joanna',
+               'Kofi', 'Lena', 'Mateo', 'Nadia', 'Omar', 'Priya', 'Quinn', 'Rosa', 'Sami', 'Tomas']
+LAST_NAMES = ['Okafor', 'Schmidt', 'Nguyen', 'Garcia', 'Kowalski', 'Haddad', 'Tanaka', 'Moreau',
+              'Petrov', 'Silva', 'Johansson', 'Abbasi', 'Reyes', 'Novak', 'Brennan', 'Yilmaz']
+DEPARTMENTS = ['Sales', 'Operations', 'Engineering', 'Finance', 'Support', 'Warehouse', 'Logistics']
+POSITIONS = ['Associate', 'Lead', 'Manager', 'Analyst', 'Technician', 'Coordinator', 'Driver']
+
+
+class Command(BaseCommand):
+    help = (
+        'Time ranked employee search and by_email lookups on a large employee '
+        'table. Creates throwaway SRCH- employees and removes them afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=200, help='Searches and email lookups to time')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark employees')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                'Trigram indexes only exist on PostgreSQL, searches scan the table here'
+            ))
+
+        rng = random.Random(options['seed'])
+        Employee.objects.filter(employee_id__startswith=SEARCH_PREFIX).delete()
+        try:
+            employees = self._seed(options['employees'], rng)
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE employees_employee')
+
+            searches = [self._search_term(rng) for _ in range(options['queries'])]
+            emails = [rng.choice(employees).email.upper() for _ in range(options['queries'])]
+            queryset = Employee.objects.all()
+
+            self._report('search', [
+                self._time(lambda term=term: list(search_employees(queryset, term)))
+                for term in searches
+            ])
+            self._report('by_email', [
+                self._time(lambda email=email: Employee.objects.get(email_lookup(email), is_active=True))
+                for email in emails
+            ])
+        finally:
+            if not options['keep']:
+                Employee.objects.filter(employee_id__startswith=SEARCH_PREFIX).delete()
+
+    def _seed(self, count, rng):
+        employees = []
+        for i in range(count):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            employees.append(Employee(
+                name=f'{first} {last}',
+                employee_id=f'{SEARCH_PREFIX}{i:06d}',
+                email=f'{first}.{last}.{i}@example.com'.lower(),
+                department=rng.choice(DEPARTMENTS),
+                position=rng.choice(POSITIONS),
+            ))
+        return Employee.objects.bulk_create(employees, batch_size=5000)
+
+    def _search_term(self, rng):
+        """A substring of a name, as typed into the search box"""
+        word = rng.choice(FIRST_NAMES + LAST_NAMES)
+        start = rng.randrange(len(word) - 2)
+        return word[start:start + rng.randint(3, len(word) - start)]
+
+    def _time(self, run):
+        started = perf_counter()
+        run()
+        return (perf_counter() - started) * 1000
+
+    def _report(self, label, timings):
+        timings.sort()
+        p50 = timings[len(timings) // 2]
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        self.stdout.write(f'{label}: {len(timings)} queries, p50 {p50:.2f} ms, p99 {p99:.2f} ms')
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:57
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+import django.db.models.functions.text
+
+# Trigram indexes on the expression icontains compiles to on PostgreSQL,
+# UPPER(column::text). Other databases have no trigram support and keep
+# scanning, so the indexes are created outside the model state.
+TRIGRAM_INDEXES = [
+    (f"employees_{field}_trgm_idx", field)
+    for field in ("name", "employee_id", "email", "department", "position")
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "employees_employee" '
+            f'USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("employees", "0001_initial"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(
+                django.db.models.functions.text.Lower("email"),
+                name="employees_email_lower_idx",
+            ),
+        ),
+    ]
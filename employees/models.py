@@ -1,7 +1,9 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import EmailValidator
+from django.db.models.functions import Lower
 import uuid
+from .business_hours import invalidate_business_schedule
 
 class CustomUser(AbstractUser):
     """Extended user model for admin users"""
@@ -37,11 +39,30 @@ class Employee(models.Model):
             models.Index(fields=['email']),
             models.Index(fields=['department']),
             models.Index(fields=['is_active']),
+            # Case-insensitive by_email lookups; the search trigram indexes
+            # are PostgreSQL only and created in migration 0002
+            models.Index(Lower('email'), name='employees_email_lower_idx'),
         ]
 
     def __str__(self):
         return f"{self.name} ({self.employee_id})"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        previous = None
+        if not self._state.adding and (
+            update_fields is None or {'name', 'department'} & set(update_fields)
+        ):
+            previous = Employee.objects.filter(pk=self.pk).values_list('name', 'department').first()
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Reports show the name and group by the department, keep their
+            # rollups and cached results in step
+            if previous is not None and previous != (self.name, self.department):
+                from reports.rollups import sync_employee_rollups
+                sync_employee_rollups(self)
+
 class BusinessHours(models.Model):
     """Business hours configuration"""
     start_time = models.TimeField(help_text="Business start time")
@@ -70,6 +91,12 @@ class BusinessHours(models.Model):
         if self.is_active:
             BusinessHours.objects.filter(is_active=True).update(is_active=False)
         super().save(*args, **kwargs)
+        transaction.on_commit(invalidate_business_schedule)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        transaction.on_commit(invalidate_business_schedule)
+        return result
 
     @classmethod
     def get_current(cls):
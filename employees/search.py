@@ -0,0 +1,45 @@
+"""Employee search.
+
+Search matches a case-insensitive substring of any of SEARCH_FIELDS. On
+PostgreSQL ``icontains`` compiles to ``UPPER(column::text) LIKE UPPER(...)``
+and every field has a trigram GIN index on exactly that expression, so a
+search is a BitmapOr of index scans instead of a sequential scan; queries
+shorter than a trigram still fall back to scanning. Ranked search orders
+the matches by how closely they hit and returns the best ``limit``.
+"""
+from django.conf import settings
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
+
+SEARCH_FIELDS = ('name', 'employee_id', 'email', 'department', 'position')
+
+
+def search_filter(query):
+    """Employees with ``query`` in any searchable field"""
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        condition |= Q(**{f'{field}__icontains': query})
+    return condition
+
+
+def search_employees(queryset, query, limit=None):
+    """The best ``limit`` matches of ``query``, closest first.
+
+    Exact employee ID or email matches come first, then names starting with
+    the query, then names containing it, then matches in the other fields.
+    """
+    limit = min(limit or settings.EMPLOYEE_SEARCH_LIMIT, settings.EMPLOYEE_SEARCH_MAX_LIMIT)
+    rank = Case(
+        When(Q(employee_id__iexact=query) | Q(email__iexact=query), then=Value(0)),
+        When(name__istartswith=query, then=Value(1)),
+        When(name__icontains=query, then=Value(2)),
+        default=Value(3),
+        output_field=IntegerField(),
+    )
+    return queryset.filter(search_filter(query)).alias(rank=rank).order_by('rank', 'name', 'id')[:limit]
+
+
+def email_lookup(email):
+    """Case-insensitive email match served by the LOWER(email) index"""
+    return Exact(Lower('email'), email.lower())
@@ -3,7 +3,8 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, BasePermission
 from rest_framework.authentication import TokenAuthentication
-from django.db import models
+from ..business_hours import get_business_schedule
+from ..search import email_lookup, search_employees, search_filter
 from ..models import Employee, BusinessHours
 from ..serializers import EmployeeSerializer, BusinessHoursSerializer
 
@@ -26,13 +27,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         # Search functionality
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                models.Q(name__icontains=search) |
-                models.Q(employee_id__icontains=search) |
-                models.Q(email__icontains=search) |
-                models.Q(department__icontains=search) |
-                models.Q(position__icontains=search)
-            )
+            queryset = queryset.filter(search_filter(search))
         
         # Filter by department
         department = self.request.query_params.get('department', None)
@@ -46,6 +41,22 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         
         return queryset.order_by('name')
 
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked employee search, the best matches first"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = int(request.query_params.get('limit', 0))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        employees = search_employees(self.get_queryset(), query, limit if limit > 0 else None)
+        serializer = self.get_serializer(employees, many=True)
+        return Response(serializer.data)
+
     @action(detail=False, methods=['get'])
     def departments(self, request):
         """Get list of all departments"""
@@ -71,7 +82,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Email parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            employee = Employee.objects.get(email__iexact=email, is_active=True)
+            employee = Employee.objects.get(email_lookup(email), is_active=True)
             serializer = self.get_serializer(employee)
             return Response(serializer.data)
         except Employee.DoesNotExist:
@@ -93,7 +104,7 @@ class BusinessHoursViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def current(self, request):
         """Get current active business hours"""
-        business_hours = BusinessHours.get_current()
+        business_hours = get_business_schedule().business_hours
         if business_hours:
             serializer = self.get_serializer(business_hours)
             return Response(serializer.data)
@@ -0,0 +1,18 @@
+from django.contrib import admin
+from .models import DailyRollup, ExportJob
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('employee', 'date', 'department', 'working_hours', 'break_minutes', 'cycle_count', 'updated_at')
+    list_filter = ('department', 'date')
+    search_fields = ('employee__name', 'employee__employee_id')
+    ordering = ('-date', 'employee__name')
+    readonly_fields = ('id', 'updated_at')
+    date_hierarchy = 'date'
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'format', 'start_date', 'end_date', 'employee', 'status', 'rows_written', 'total_rows', 'created_at')
+    list_filter = ('format', 'status', 'created_at')
+    ordering = ('-created_at',)
+    readonly_fields = ('id', 'params_hash', 'created_at', 'updated_at')
@@ -0,0 +1,108 @@
+"""Versioned cache of report results.
+
+Results are cached under (endpoint, parameters, data version). The data
+version of a date range is made of one counter per calendar month it
+touches; saving or deleting a work session bumps its month once the
+transaction commits, so every cached report covering that month is
+bypassed and ages out on its own. Missing counters start from a fresh
+timestamp rather than zero so an evicted counter can never resurface an
+old result.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'reports:version:{}'
+RESULT_KEY = 'reports:result:{}:{}'
+STATS_KEY = 'reports:stats:{}:{}'
+
+# Endpoints whose hit/miss counters are reported
+CACHED_REPORTS = ('overview', 'employees', 'daily')
+
+
+def months_between(start_date, end_date):
+    """'YYYY-MM' of every month from start_date to end_date"""
+    months = []
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        months.append(f'{year:04d}-{month:02d}')
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def data_version(start_date, end_date):
+    """Current data version of a date range"""
+    keys = [VERSION_KEY.format(month) for month in months_between(start_date, end_date)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_report_versions(dates):
+    """Invalidate cached reports covering any of ``dates``"""
+    for month in {f'{day.year:04d}-{day.month:02d}' for day in dates}:
+        key = VERSION_KEY.format(month)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def bump_report_versions_on_commit(dates):
+    """Bump report versions once the current transaction commits"""
+    dates = set(dates)
+    if dates:
+        transaction.on_commit(lambda: bump_report_versions(dates))
+
+
+def _count(endpoint, outcome):
+    key = STATS_KEY.format(endpoint, outcome)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def cached_report(endpoint, params, start_date, end_date, build):
+    """Return a report from the cache, building and storing it on a miss"""
+    fingerprint = hashlib.sha256(json.dumps(
+        [sorted(params.items()), data_version(start_date, end_date)], default=str
+    ).encode()).hexdigest()
+    key = RESULT_KEY.format(endpoint, fingerprint)
+
+    result = cache.get(key)
+    if result is not None:
+        _count(endpoint, 'hits')
+        return result
+
+    _count(endpoint, 'misses')
+    result = build()
+    cache.set(key, result, settings.REPORT_CACHE_TTL)
+    return result
+
+
+def report_cache_stats():
+    """Hit and miss counters of every cached report"""
+    counters = cache.get_many([
+        STATS_KEY.format(endpoint, outcome)
+        for endpoint in CACHED_REPORTS
+        for outcome in ('hits', 'misses')
+    ])
+    stats = {}
+    for endpoint in CACHED_REPORTS:
+        hits = counters.get(STATS_KEY.format(endpoint, 'hits'), 0)
+        misses = counters.get(STATS_KEY.format(endpoint, 'misses'), 0)
+        stats[endpoint] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits * 100 / (hits + misses), 1) if hits + misses else 0,
+        }
+    return stats
@@ -0,0 +1,241 @@
+"""Timesheet export rows.
+
+Sessions are read in chunks through a server-side cursor with their punch
+cycles prefetched one chunk at a time, so an export holds at most one chunk
+in memory whatever the date range.
+"""
+import csv
+import hashlib
+import json
+import re
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max, Prefetch
+
+from timetracking.models import WorkSession, PunchCycle
+from .models import DailyRollup
+
+EXPORT_CHUNK_SIZE = 2000
+
+CSV_HEADERS = [
+    'Employee Name', 'Employee ID', 'Date', 'First Punch In',
+    'Last Punch Out', 'Total Hours', 'Break Duration (min)',
+    'Working Hours', 'Late Arrivals', 'Early Departures', 'Status'
+]
+
+
+def export_sessions(start_date, end_date, employee_id=None, include_punch_cycles=True):
+    """Work sessions of an export, in timesheet order"""
+    sessions = WorkSession.objects.filter(
+        date__gte=start_date,
+        date__lte=end_date
+    ).select_related('employee')
+
+    if employee_id:
+        sessions = sessions.filter(employee_id=employee_id)
+    if include_punch_cycles:
+        sessions = sessions.prefetch_related(Prefetch(
+            'punch_cycles',
+            queryset=PunchCycle.objects.only(
+                'id', 'work_session_id', 'punch_in', 'punch_out', 'is_late_in', 'is_early_out',
+                'duration_hours', 'break_minutes'
+            )
+        ))
+    return sessions
+
+
+def iter_sessions(sessions, chunk_size=EXPORT_CHUNK_SIZE):
+    """Stream sessions in chunks, prefetching each chunk's cycles"""
+    return sessions.iterator(chunk_size=chunk_size)
+
+
+def punch_cycles_text(session):
+    """Cycles of a session as "Cycle 1: 09:00 - 12:00 (Late); ..." """
+    cycle_texts = []
+    for i, cycle in enumerate(session.punch_cycles.all()):
+        cycle_text = f"Cycle {i+1}: {cycle.punch_in.strftime('%H:%M')}"
+        if cycle.punch_out:
+            cycle_text += f" - {cycle.punch_out.strftime('%H:%M')}"
+        else:
+            cycle_text += " - In Progress"
+
+        if cycle.is_late_in:
+            cycle_text += " (Late)"
+        if cycle.is_early_out:
+            cycle_text += " (Early)"
+
+        cycle_texts.append(cycle_text)
+
+    return '; '.join(cycle_texts)
+
+
+def timesheet_row(session, include_punch_cycles):
+    """CSV row of a work session"""
+    row = [
+        session.employee.name,
+        session.employee.employee_id,
+        session.date.strftime('%Y-%m-%d'),
+        session.punch_in.strftime('%H:%M:%S') if session.punch_in else '',
+        session.punch_out.strftime('%H:%M:%S') if session.punch_out else '',
+        f"{session.total_hours:.2f}",
+        f"{session.break_duration:.0f}",
+        f"{session.working_hours:.2f}",
+        '1' if session.is_late_in else '0',
+        '1' if session.is_early_out else '0',
+        session.get_status_display()
+    ]
+
+    if include_punch_cycles:
+        row.append(punch_cycles_text(session))
+
+    return row
+
+
+class Echo:
+    """File-like object whose write() hands back the written value"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(sessions, include_punch_cycles, chunk_size=EXPORT_CHUNK_SIZE, progress=None):
+    """CSV lines of a timesheet, header first.
+
+    ``progress`` is called with the number of rows written after every chunk.
+    """
+    writer = csv.writer(Echo())
+    headers = CSV_HEADERS + ['Punch Cycles'] if include_punch_cycles else CSV_HEADERS
+    yield writer.writerow(headers)
+    rows = 0
+    for session in iter_sessions(sessions, chunk_size):
+        yield writer.writerow(timesheet_row(session, include_punch_cycles))
+        rows += 1
+        if progress and rows % chunk_size == 0:
+            progress(rows)
+    if progress:
+        progress(rows)
+
+
+def session_record(session, include_punch_cycles):
+    """JSON-ready record of a work session, with its cycles as a nested list"""
+    record = {
+        'id': session.pk,
+        'employee_id': session.employee_id,
+        'employee_code': session.employee.employee_id,
+        'employee_name': session.employee.name,
+        'date': session.date,
+        'punch_in': session.punch_in,
+        'punch_out': session.punch_out,
+        'total_hours': session.total_hours,
+        'break_minutes': session.break_duration,
+        'working_hours': session.working_hours,
+        'is_late_in': session.is_late_in,
+        'is_early_out': session.is_early_out,
+        'status': session.status,
+    }
+    if include_punch_cycles:
+        record['punch_cycles'] = [
+            {
+                'punch_in': cycle.punch_in,
+                'punch_out': cycle.punch_out,
+                'duration_hours': cycle.duration_hours,
+                'break_minutes': cycle.break_minutes,
+                'is_late_in': cycle.is_late_in,
+                'is_early_out': cycle.is_early_out,
+            }
+            for cycle in session.punch_cycles.all()
+        ]
+    return record
+
+
+def iter_ndjson(sessions, include_punch_cycles, chunk_size=EXPORT_CHUNK_SIZE, progress=None):
+    """One JSON document per session and line; decimals are strings"""
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    rows = 0
+    for session in iter_sessions(sessions, chunk_size):
+        yield encoder.encode(session_record(session, include_punch_cycles)) + '\n'
+        rows += 1
+        if progress and rows % chunk_size == 0:
+            progress(rows)
+    if progress:
+        progress(rows)
+
+
+def iter_gzip(lines, level=6):
+    """Gzip a stream of text lines incrementally"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for line in lines:
+        data = compressor.compress(line.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# Line generator and content type of each export job format
+EXPORT_FORMATS = {
+    'csv': (iter_csv, 'text/csv'),
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+}
+
+
+def export_params_hash(params):
+    """Stable hash of export parameters, used to reuse identical exports"""
+    canonical = json.dumps(params, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def data_changed_since(start_date, end_date, employee_id, since, session_count):
+    """Whether an export's range changed since it held ``session_count`` sessions at ``since``.
+
+    Saved sessions move their rollup's updated_at past ``since``; deleted ones
+    take their rollup with them, which only shows in the count.
+    """
+    rollups = DailyRollup.objects.filter(date__gte=start_date, date__lte=end_date)
+    if employee_id:
+        rollups = rollups.filter(employee_id=employee_id)
+    row = rollups.aggregate(count=Count('id'), last_change=Max('updated_at'))
+    if row['count'] != session_count:
+        return True
+    return row['last_change'] is not None and row['last_change'] > since
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_byte_range(header, size):
+    """(start, end) of a single HTTP byte range, inclusive.
+
+    Returns None when the whole file should be sent (no header, several
+    ranges or a malformed one) and False when the range can't be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Suffix range, the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def iter_file_range(handle, start, end, block_size=64 * 1024):
+    """Bytes ``start``..``end`` (inclusive) of an open file"""
+    handle.seek(start)
+    remaining = end - start + 1
+    try:
+        while remaining > 0:
+            data = handle.read(min(block_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+    finally:
+        handle.close()
@@ -0,0 +1,102 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F
+
+from reports.models import DailyRollup
+from reports.rollups import ROLLUP_FIELDS, build_daily_rollup, sync_daily_rollups
+from timetracking.models import WorkSession
+
+# Rollup fields compared by --verify
+VERIFY_FIELDS = [name for name in ROLLUP_FIELDS if name not in ('employee', 'updated_at')] + ['employee_id']
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily report rollups from work sessions, or verify them with --verify'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-date', help='First date to rebuild (YYYY-MM-DD), default: all')
+        parser.add_argument('--end-date', help='Last date to rebuild (YYYY-MM-DD), default: all')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.SESSION_RECOMPUTE_BATCH_SIZE,
+            help='Sessions read and rollups written per batch',
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Compare the stored rollups with the sessions instead of writing them',
+        )
+
+    def handle(self, *args, **options):
+        sessions = WorkSession.objects.all()
+        for option, lookup in (('start_date', 'date__gte'), ('end_date', 'date__lte')):
+            if options[option]:
+                try:
+                    value = datetime.strptime(options[option], '%Y-%m-%d').date()
+                except ValueError:
+                    raise CommandError(f'Invalid {option}, use YYYY-MM-DD')
+                sessions = sessions.filter(**{lookup: value})
+
+        sessions = sessions.order_by('pk').annotate(
+            cycle_count=Count('punch_cycles'),
+            department=F('employee__department'),
+        ).only(
+            'id', 'date', 'employee_id', 'working_hours', 'break_duration',
+            'is_late_in', 'is_early_out'
+        )
+
+        batch_size = options['batch_size']
+        handle_batch = self._verify_batch if options['verify'] else self._write_batch
+        total, problems, batch = 0, 0, []
+        for work_session in sessions.iterator(chunk_size=batch_size):
+            batch.append(work_session)
+            if len(batch) == batch_size:
+                problems += handle_batch(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            problems += handle_batch(batch)
+            total += len(batch)
+
+        if not options['verify']:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} daily rollups'))
+        elif problems:
+            raise CommandError(f'{problems} of {total} daily rollups are missing or stale')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'All {total} daily rollups match their sessions'))
+
+    def _write_batch(self, batch):
+        with transaction.atomic():
+            sync_daily_rollups(
+                [(work_session, work_session.cycle_count) for work_session in batch],
+                batch_size=len(batch)
+            )
+        return 0
+
+    def _verify_batch(self, batch):
+        stored = {
+            rollup.work_session_id: rollup
+            for rollup in DailyRollup.objects.filter(work_session__in=[work_session.pk for work_session in batch])
+        }
+        problems = 0
+        for work_session in batch:
+            expected = build_daily_rollup(work_session, work_session.department, work_session.cycle_count)
+            rollup = stored.get(work_session.pk)
+            if rollup is None:
+                self.stdout.write(self.style.ERROR(f'{work_session.employee_id} {work_session.date}: missing'))
+                problems += 1
+                continue
+            stale = [
+                name for name in VERIFY_FIELDS
+                if getattr(rollup, name) != getattr(expected, name)
+            ]
+            if stale:
+                self.stdout.write(self.style.ERROR(
+                    f'{work_session.employee_id} {work_session.date}: {", ".join(stale)} differ'
+                ))
+                problems += 1
+        return problems
@@ -0,0 +1,124 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_daily_rollups(apps, schema_editor):
+    # One rollup per existing session, as sync_daily_rollups would write it
+    WorkSession = apps.get_model("timetracking", "WorkSession")
+    DailyRollup = apps.get_model("reports", "DailyRollup")
+    sessions = (
+        WorkSession.objects.order_by("pk")
+        .annotate(
+            cycle_count=models.Count("punch_cycles"),
+            department=models.F("employee__department"),
+        )
+        .values_list(
+            "pk",
+            "date",
+            "employee_id",
+            "department",
+            "working_hours",
+            "break_duration",
+            "is_late_in",
+            "is_early_out",
+            "cycle_count",
+        )
+    )
+    batch = []
+    for row in sessions.iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        pk, date, employee_id, department, hours, breaks, late, early, cycles = row
+        batch.append(
+            DailyRollup(
+                work_session_id=pk,
+                date=date,
+                employee_id=employee_id,
+                department=department,
+                working_hours=hours,
+                break_minutes=breaks,
+                session_count=1,
+                late_count=int(late),
+                early_count=int(early),
+                cycle_count=cycles,
+            )
+        )
+        if len(batch) == BACKFILL_BATCH_SIZE:
+            DailyRollup.objects.bulk_create(batch)
+            batch = []
+    DailyRollup.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ("employees", "0001_initial"),
+        ("timetracking", "0004_workstatus"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("department", models.CharField(max_length=100)),
+                (
+                    "working_hours",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=7),
+                ),
+                (
+                    "break_minutes",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=7),
+                ),
+                ("session_count", models.PositiveIntegerField(default=0)),
+                ("late_count", models.PositiveIntegerField(default=0)),
+                ("early_count", models.PositiveIntegerField(default=0)),
+                ("cycle_count", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "employee",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_rollups",
+                        to="employees.employee",
+                    ),
+                ),
+                (
+                    "work_session",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rollup",
+                        to="timetracking.worksession",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["date"],
+                "indexes": [
+                    models.Index(
+                        fields=["date", "department"],
+                        name="reports_dai_date_2e8f17_idx",
+                    ),
+                    models.Index(
+                        fields=["employee", "date"],
+                        name="reports_dai_employe_b86be8_idx",
+                    ),
+                ],
+                "unique_together": {("date", "employee", "department")},
+            },
+        ),
+        migrations.RunPython(backfill_daily_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports", "0002_exportjob"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="exportjob",
+            name="format",
+            field=models.CharField(
+                choices=[("csv", "CSV"), ("ndjson", "NDJSON")],
+                default="csv",
+                max_length=10,
+            ),
+        ),
+    ]
@@ -1,4 +1,84 @@
 from django.db import models
+import uuid
 
-# Reports app doesn't need additional models
-# It uses models from timetracking and employees apps
\ No newline at end of file
+from employees.models import Employee
+from timetracking.models import WorkSession
+
+class DailyRollup(models.Model):
+    """Report totals of one employee-day, kept in step with its work session"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    work_session = models.OneToOneField(WorkSession, on_delete=models.CASCADE, related_name='rollup')
+    date = models.DateField()
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='daily_rollups')
+    department = models.CharField(max_length=100)
+    working_hours = models.DecimalField(max_digits=7, decimal_places=2, default=0)
+    break_minutes = models.DecimalField(max_digits=7, decimal_places=2, default=0)
+    session_count = models.PositiveIntegerField(default=0)
+    late_count = models.PositiveIntegerField(default=0)
+    early_count = models.PositiveIntegerField(default=0)
+    cycle_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['date', 'employee', 'department']
+        ordering = ['date']
+        indexes = [
+            models.Index(fields=['date', 'department']),
+            models.Index(fields=['employee', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.employee.name} - {self.date} ({self.working_hours}h)"
+
+class ExportJob(models.Model):
+    """A timesheet export generated in the background into file storage"""
+
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('ndjson', 'NDJSON'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('complete', 'Complete'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    start_date = models.DateField()
+    end_date = models.DateField()
+    employee = models.ForeignKey(
+        Employee, on_delete=models.CASCADE, null=True, blank=True, related_name='export_jobs'
+    )
+    include_punch_cycles = models.BooleanField(default=True)
+    params_hash = models.CharField(max_length=64, help_text="Hash of the export parameters")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    total_rows = models.PositiveIntegerField(default=0)
+    rows_written = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to='exports/', blank=True)
+    file_size = models.PositiveBigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['params_hash', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_format_display()} export {self.start_date} to {self.end_date} ({self.status})"
+
+    @property
+    def progress(self):
+        """Percent of rows written"""
+        if self.status == 'complete':
+            return 100
+        if not self.total_rows:
+            return 0
+        return round(self.rows_written * 100 / self.total_rows, 1)
@@ -0,0 +1,89 @@
+"""Daily report rollups.
+
+Reports read per employee-day totals from DailyRollup instead of
+re-aggregating sessions and cycles. Every code path that saves a
+WorkSession passes it here, which also invalidates cached reports of its
+month; rows go away with their session. Rollups carry the employee's
+department so reports filter and group on it without a join, and are
+re-synced when an employee is renamed or moves department.
+"""
+from django.db.models import Count
+from django.utils import timezone
+
+from employees.models import Employee
+from timetracking.models import PunchCycle
+from .cache import bump_report_versions_on_commit
+from .models import DailyRollup
+
+ROLLUP_FIELDS = [
+    'date', 'employee', 'department', 'working_hours', 'break_minutes',
+    'session_count', 'late_count', 'early_count', 'cycle_count', 'updated_at',
+]
+
+
+def build_daily_rollup(work_session, department, cycle_count):
+    """Unsaved rollup row of a work session"""
+    return DailyRollup(
+        work_session=work_session,
+        date=work_session.date,
+        employee_id=work_session.employee_id,
+        department=department,
+        working_hours=work_session.working_hours,
+        break_minutes=work_session.break_duration,
+        session_count=1,
+        late_count=int(work_session.is_late_in),
+        early_count=int(work_session.is_early_out),
+        cycle_count=cycle_count,
+        updated_at=timezone.now(),
+    )
+
+
+def sync_daily_rollups(pairs, batch_size=None):
+    """Upsert the rollups of saved work sessions.
+
+    ``pairs`` holds (work_session, cycle_count) tuples; a cycle count of None
+    is read from the database. Departments are read in one query.
+    """
+    if not pairs:
+        return []
+
+    departments = dict(Employee.objects.filter(
+        pk__in={work_session.employee_id for work_session, _ in pairs}
+    ).values_list('pk', 'department'))
+
+    uncounted = [work_session.pk for work_session, cycle_count in pairs if cycle_count is None]
+    counted = {}
+    if uncounted:
+        counted = dict(PunchCycle.objects.filter(
+            work_session__in=uncounted
+        ).order_by().values('work_session').annotate(
+            count=Count('id')
+        ).values_list('work_session', 'count'))
+
+    rollups = [
+        build_daily_rollup(
+            work_session,
+            departments.get(work_session.employee_id, ''),
+            counted.get(work_session.pk, 0) if cycle_count is None else cycle_count
+        )
+        for work_session, cycle_count in pairs
+    ]
+    bump_report_versions_on_commit(work_session.date for work_session, _ in pairs)
+    return DailyRollup.objects.bulk_create(
+        rollups,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['work_session'],
+        update_fields=ROLLUP_FIELDS
+    )
+
+
+def sync_employee_rollups(employee):
+    """Carry an employee's department over to their rollups.
+
+    Cached reports of every month the employee has rollups in show their
+    name and department, so those are invalidated as well.
+    """
+    rollups = DailyRollup.objects.filter(employee=employee)
+    rollups.exclude(department=employee.department).update(department=employee.department)
+    bump_report_versions_on_commit(rollups.dates('date', 'month'))
@@ -1,6 +1,8 @@
 from rest_framework import serializers
+from django.urls import reverse
 from timetracking.models import WorkSession
 from employees.models import Employee
+from .models import ExportJob
 
 class ReportStatsSerializer(serializers.Serializer):
     total_sessions = serializers.IntegerField()
@@ -33,4 +35,38 @@ class CSVExportSerializer(serializers.Serializer):
     start_date = serializers.DateField()
     end_date = serializers.DateField()
     employee_id = serializers.UUIDField(required=False)
-    include_punch_cycles = serializers.BooleanField(default=True)
\ No newline at end of file
+    include_punch_cycles = serializers.BooleanField(default=True)
+
+class ExportJobCreateSerializer(CSVExportSerializer):
+    format = serializers.ChoiceField(choices=ExportJob.FORMAT_CHOICES, default='csv')
+
+    def validate_employee_id(self, value):
+        if not Employee.objects.filter(pk=value).exists():
+            raise serializers.ValidationError('Employee not found.')
+        return value
+
+    def validate(self, data):
+        if data['start_date'] > data['end_date']:
+            raise serializers.ValidationError('start_date must not be after end_date.')
+        return data
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    employee_id = serializers.UUIDField(read_only=True)
+    progress = serializers.FloatField(read_only=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = (
+            'id', 'format', 'start_date', 'end_date', 'employee_id', 'include_punch_cycles',
+            'status', 'total_rows', 'rows_written', 'progress', 'file_size', 'error',
+            'download_url', 'started_at', 'finished_at', 'created_at'
+        )
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.status != 'complete':
+            return None
+        url = reverse('export-job-download', kwargs={'pk': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
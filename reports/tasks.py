@@ -0,0 +1,60 @@
+"""Background export jobs.
+
+An ExportJob is written to a temporary file while progress is recorded on
+the job row, then saved to the default file storage: the local media
+directory, or S3 when django-storages is configured.
+"""
+import logging
+import tempfile
+
+from celery import shared_task
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .exports import EXPORT_FORMATS, export_sessions
+from .models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def generate_export(job_id):
+    """Write an export job's file and mark it complete"""
+    # Claim the job so a redelivered task does not write it twice
+    claimed = ExportJob.objects.filter(pk=job_id, status='pending').update(
+        status='running', started_at=timezone.now(), updated_at=timezone.now()
+    )
+    if not claimed:
+        return
+    job = ExportJob.objects.get(pk=job_id)
+    jobs = ExportJob.objects.filter(pk=job.pk)
+
+    try:
+        sessions = export_sessions(
+            job.start_date, job.end_date, job.employee_id, job.include_punch_cycles
+        )
+        jobs.update(total_rows=sessions.count())
+
+        def progress(rows):
+            jobs.update(rows_written=rows, updated_at=timezone.now())
+
+        iter_lines, _ = EXPORT_FORMATS[job.format]
+        with tempfile.TemporaryFile() as tmp:
+            for line in iter_lines(sessions, job.include_punch_cycles, progress=progress):
+                tmp.write(line.encode('utf-8') if isinstance(line, str) else line)
+            file_size = tmp.tell()
+            tmp.seek(0)
+            name = default_storage.save(f'exports/{job.pk}.{job.format}', File(tmp))
+    except Exception as e:
+        logger.exception('Export job %s failed', job.pk)
+        jobs.update(status='failed', error=str(e), finished_at=timezone.now(), updated_at=timezone.now())
+        return
+
+    jobs.update(
+        status='complete',
+        file=name,
+        file_size=file_size,
+        finished_at=timezone.now(),
+        updated_at=timezone.now()
+    )
@@ -0,0 +1,244 @@
+import shutil
+import tempfile
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from timetracking.local_calendar import CENTRAL_TZ
+from timetracking.models import TimeEntry, WorkSession
+from timetracking.tests import create_employee
+from timetracking.utils import TimeCalculationService
+from .models import DailyRollup, ExportJob
+from .tasks import generate_export
+
+
+def punch_days(employee, first_date, days):
+    """A morning and an afternoon cycle on each of ``days`` days, with sessions generated"""
+    entries = []
+    for day in range(days):
+        work_date = first_date + timedelta(days=day)
+        for start, end in ((time(8), time(12)), (time(13), time(17, 30))):
+            for entry_type, moment in (('punch_in', start), ('punch_out', end)):
+                entries.append(TimeEntry(
+                    employee=employee,
+                    type=entry_type,
+                    timestamp=CENTRAL_TZ.localize(datetime.combine(work_date, moment))
+                ))
+    TimeEntry.objects.bulk_create(entries)
+    TimeCalculationService().bulk_generate_work_sessions(
+        first_date.isoformat(), (first_date + timedelta(days=days - 1)).isoformat()
+    )
+
+
+class ExportJobReuseTests(TestCase):
+    """A finished export is handed out again until its data changes"""
+
+    first_date = date(2026, 3, 2)
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.client = APIClient()
+        self.employee = create_employee()
+        punch_days(self.employee, self.first_date, 5)
+
+    def request_export(self):
+        return self.client.post(reverse('export-job-create'), {
+            'start_date': self.first_date.isoformat(),
+            'end_date': (self.first_date + timedelta(days=4)).isoformat(),
+        }, format='json')
+
+    def finished_export(self):
+        response = self.request_export()
+        self.assertEqual(response.status_code, 202)
+        generate_export(response.data['id'])
+        job = ExportJob.objects.get(pk=response.data['id'])
+        self.assertEqual((job.status, job.total_rows), ('complete', 5))
+        return job
+
+    def test_unknown_employee_rejected(self):
+        response = self.client.post(reverse('export-job-create'), {
+            'start_date': self.first_date.isoformat(),
+            'end_date': self.first_date.isoformat(),
+            'employee_id': '00000000-0000-0000-0000-000000000000',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('employee_id', response.data)
+        self.assertFalse(ExportJob.objects.exists())
+
+    def test_unchanged_data_reuses_export(self):
+        job = self.finished_export()
+        response = self.request_export()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], str(job.pk))
+
+    def test_deleted_session_starts_new_export(self):
+        self.finished_export()
+        WorkSession.objects.filter(date=self.first_date).delete()
+        self.assertEqual(self.request_export().status_code, 202)
+
+    def test_session_saved_during_export_starts_new_export(self):
+        job = self.finished_export()
+        # A session saved after the export started may be missing from its file
+        changed_at = DailyRollup.objects.order_by('-updated_at').values_list('updated_at', flat=True)[0]
+        ExportJob.objects.filter(pk=job.pk).update(
+            started_at=changed_at - timedelta(seconds=1), finished_at=changed_at + timedelta(seconds=1)
+        )
+        self.assertEqual(self.request_export().status_code, 202)
+
+
+class EmployeeDepartmentChangeTests(TestCase):
+    """Reports follow an employee who moves department"""
+
+    first_date = date(2026, 3, 2)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.employee = create_employee()
+        punch_days(self.employee, self.first_date, 3)
+
+    def employee_report(self, **params):
+        return self.client.get(reverse('employee-reports'), {
+            'start_date': self.first_date.isoformat(),
+            'end_date': (self.first_date + timedelta(days=2)).isoformat(),
+            **params
+        })
+
+    def test_moved_employee_reported_under_new_department(self):
+        self.assertEqual(self.employee_report().data[0]['department'], 'Engineering')
+
+        self.employee.department = 'Research'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee.save()
+
+        self.assertEqual(set(DailyRollup.objects.values_list('department', flat=True)), {'Research'})
+        self.assertEqual(self.employee_report().data[0]['department'], 'Research')
+        self.assertEqual(self.employee_report(department='Engineering').data, [])
+        self.assertEqual(len(self.employee_report(department='Research').data), 1)
+
+        series = self.employee_report(group_by='department').data
+        self.assertEqual(series['columns']['department'], ['Research'])
+        self.assertEqual(series['columns']['sessions'], [3])
+
+
+class WorkSessionWriteTests(TestCase):
+    """Sessions written through the sessions API keep their rollups in step"""
+
+    first_date = date(2026, 3, 2)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.employee = create_employee()
+        punch_days(self.employee, self.first_date, 2)
+
+    def overview(self):
+        return self.client.get(reverse('reports-overview'), {
+            'start_date': self.first_date.isoformat(),
+            'end_date': (self.first_date + timedelta(days=9)).isoformat(),
+        }).data
+
+    def test_created_session_gets_rollup(self):
+        self.assertEqual(self.overview()['total_sessions'], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('work-sessions-list'), {
+                'employee': str(self.employee.pk),
+                'date': (self.first_date + timedelta(days=5)).isoformat(),
+                'working_hours': '6.00',
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(DailyRollup.objects.filter(work_session_id=response.data['id']).exists())
+        self.assertEqual(self.overview()['total_sessions'], 3)
+
+    def test_updated_session_updates_rollup(self):
+        work_session = WorkSession.objects.get(date=self.first_date)
+        self.assertIsNotNone(work_session.last_entry_at)
+        self.overview()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse('work-sessions-detail', args=[work_session.pk]), {'working_hours': '1.25'}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        work_session.refresh_from_db()
+        self.assertIsNone(work_session.last_entry_at)
+        self.assertEqual(work_session.rollup.working_hours, Decimal('1.25'))
+        self.assertEqual(Decimal(str(self.overview()['total_working_hours'])), Decimal('9.75'))
+
+    def test_last_entry_at_not_exposed(self):
+        work_session = WorkSession.objects.get(date=self.first_date)
+        url = reverse('work-sessions-detail', args=[work_session.pk])
+        self.assertNotIn('last_entry_at', self.client.get(url).data)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(url, {'last_entry_at': '2026-03-02T23:00:00Z'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('last_entry_at', response.data)
+        work_session.refresh_from_db()
+        self.assertIsNone(work_session.last_entry_at)
+
+    def test_deleted_session_leaves_reports(self):
+        work_session = WorkSession.objects.get(date=self.first_date)
+        self.assertEqual(self.overview()['total_sessions'], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('work-sessions-detail', args=[work_session.pk]))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.overview()['total_sessions'], 1)
+
+
+class ReportQueryCountTests(TestCase):
+    """Reports take the same number of queries whatever their date range"""
+
+    first_date = date(2026, 1, 5)
+
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(3):
+            employee = create_employee(
+                name=f'Employee {number}', employee_id=f'E-{number}', email=f'e{number}@example.com',
+                department=f'Department {number % 2}'
+            )
+            punch_days(employee, cls.first_date, 90)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def assertQueriesIndependentOfRange(self, url_name, queries, **params):
+        for days in (1, 90):
+            cache.clear()
+            with self.subTest(days=days), self.assertNumQueries(queries):
+                response = self.client.get(reverse(url_name), {
+                    'start_date': self.first_date.isoformat(),
+                    'end_date': (self.first_date + timedelta(days=days - 1)).isoformat(),
+                    **params
+                })
+            self.assertEqual(response.status_code, 200)
+
+    def test_overview(self):
+        self.assertQueriesIndependentOfRange('reports-overview', 1)
+
+    def test_employee_reports(self):
+        self.assertQueriesIndependentOfRange('employee-reports', 1)
+
+    def test_daily_reports(self):
+        self.assertQueriesIndependentOfRange('daily-reports', 1)
+
+    def test_series(self):
+        self.assertQueriesIndependentOfRange('reports-overview', 1, granularity='week', group_by='department')
+
+    def test_cached_report(self):
+        params = {
+            'start_date': self.first_date.isoformat(),
+            'end_date': (self.first_date + timedelta(days=89)).isoformat(),
+        }
+        self.assertEqual(self.client.get(reverse('reports-overview'), params).data['total_sessions'], 270)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse('reports-overview'), params).data['total_sessions'], 270)
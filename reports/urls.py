@@ -1,12 +1,18 @@
 from django.urls import path
 from .views import (
     ReportsOverviewView, EmployeeReportsView, 
-    DailyReportsView, CSVExportView
+    DailyReportsView, CSVExportView, NDJSONExportView, ExportJobCreateView,
+    ExportJobDetailView, ExportJobDownloadView, ReportCacheStatsView
 )
 
 urlpatterns = [
     path('overview/', ReportsOverviewView.as_view(), name='reports-overview'),
     path('employees/', EmployeeReportsView.as_view(), name='employee-reports'),
     path('daily/', DailyReportsView.as_view(), name='daily-reports'),
+    path('cache-stats/', ReportCacheStatsView.as_view(), name='report-cache-stats'),
     path('export/csv/', CSVExportView.as_view(), name='csv-export'),
+    path('export/ndjson/', NDJSONExportView.as_view(), name='ndjson-export'),
+    path('exports/', ExportJobCreateView.as_view(), name='export-job-create'),
+    path('exports/<uuid:pk>/', ExportJobDetailView.as_view(), name='export-job-detail'),
+    path('exports/<uuid:pk>/download/', ExportJobDownloadView.as_view(), name='export-job-download'),
 ]
\ No newline at end of file
@@ -2,18 +2,89 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from django.http import HttpResponse
-from django.db.models import Sum, Avg, Count, Q
+from django.conf import settings
+from django.db import transaction
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from rest_framework.generics import get_object_or_404
+from rest_framework.pagination import LimitOffsetPagination
+from django.db.models import Sum, Avg, F, ExpressionWrapper, FloatField
+from django.db.models.functions import Cast, Coalesce
 from datetime import datetime, timedelta
-import csv
-import io
+from decimal import Decimal
+import re
 
-from timetracking.models import WorkSession, TimeEntry
-from employees.models import Employee
+from .models import DailyRollup, ExportJob
+from .exports import (
+    EXPORT_FORMATS, export_sessions, iter_csv, iter_ndjson, iter_gzip, export_params_hash,
+    data_changed_since, parse_byte_range, iter_file_range
+)
 from .serializers import (
     ReportStatsSerializer, EmployeeStatsSerializer, 
-    DailyReportSerializer, CSVExportSerializer
+    DailyReportSerializer, CSVExportSerializer,
+    ExportJobCreateSerializer, ExportJobSerializer
 )
+from .tasks import generate_export
+from .cache import cached_report, report_cache_stats
+from .series import GRANULARITIES, GROUPINGS, rollup_series
+
+ACCEPTS_GZIP_RE = re.compile(r'\bgzip\b')
+
+def streaming_export_response(request, lines, content_type, filename):
+    """Stream export lines, gzipped on the fly when the client accepts it"""
+    if ACCEPTS_GZIP_RE.search(request.headers.get('Accept-Encoding', '')):
+        response = StreamingHttpResponse(iter_gzip(lines), content_type=content_type)
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = StreamingHttpResponse(lines, content_type=content_type)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+def parse_date_range(start_date, end_date):
+    """start_date and end_date query parameters as dates"""
+    return (
+        datetime.strptime(start_date, '%Y-%m-%d').date(),
+        datetime.strptime(end_date, '%Y-%m-%d').date(),
+    )
+
+def report_params(request):
+    """Query parameters that select a report's data, for its cache key"""
+    return {
+        name: value for name, value in request.query_params.items()
+        if name not in ReportPagination.pagination_params
+    }
+
+def wants_series(request):
+    """Whether a report is asked for as columnar series"""
+    return 'granularity' in request.query_params or 'group_by' in request.query_params
+
+def series_response(request, endpoint, rollups, date_range, granularity=None, group_by=None):
+    """Columnar report grouped by ?granularity= and ?group_by=, cached like the report"""
+    granularity = request.query_params.get('granularity', granularity)
+    group_by = request.query_params.get('group_by', group_by)
+    if granularity not in GRANULARITIES and granularity is not None:
+        return Response(
+            {'error': f'granularity must be one of: {", ".join(GRANULARITIES)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if group_by not in GROUPINGS and group_by is not None:
+        return Response(
+            {'error': f'group_by must be one of: {", ".join(GROUPINGS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return Response(cached_report(
+        endpoint, report_params(request), *date_range,
+        lambda: rollup_series(rollups, granularity, group_by)
+    ))
+
+class ReportPagination(LimitOffsetPagination):
+    """Opt-in paging for per-employee reports, unpaged unless ?limit= is given"""
+    default_limit = None
+    max_limit = 1000
+    pagination_params = ('limit', 'offset')
 
 class ReportsOverviewView(APIView):
     # permission_classes = [IsAuthenticated]
@@ -29,37 +100,41 @@ class ReportsOverviewView(APIView):
                 {'error': 'start_date and end_date are required'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
+        try:
+            date_range = parse_date_range(start_date, end_date)
+        except ValueError:
+            return Response(
+                {'error': 'start_date and end_date must be YYYY-MM-DD dates'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # Filter work sessions
-        sessions = WorkSession.objects.filter(
+        rollups = DailyRollup.objects.filter(
             date__gte=start_date,
             date__lte=end_date
         )
 
         if employee_id:
-            sessions = sessions.filter(employee_id=employee_id)
-
-        # Calculate statistics
-        stats = {
-            'total_sessions': sessions.count(),
-            'total_working_hours': sessions.aggregate(
-                total=Sum('working_hours')
-            )['total'] or 0,
-            'total_break_time': sessions.aggregate(
-                total=Sum('break_duration')
-            )['total'] or 0,
-            'late_arrivals': sessions.filter(is_late_in=True).count(),
-            'early_departures': sessions.filter(is_early_out=True).count(),
-            'average_hours_per_day': sessions.aggregate(
-                avg=Avg('working_hours')
-            )['avg'] or 0,
-            'total_punch_cycles': sum(
-                session.punch_cycles.count() for session in sessions
+            rollups = rollups.filter(employee_id=employee_id)
+
+        if wants_series(request):
+            return series_response(request, 'overview', rollups, date_range)
+
+        def build():
+            # Calculate statistics from the daily rollups, one row per session
+            stats = rollups.aggregate(
+                total_sessions=Coalesce(Sum('session_count'), 0),
+                total_working_hours=Coalesce(Sum('working_hours'), Decimal('0')),
+                total_break_time=Coalesce(Sum('break_minutes'), Decimal('0')),
+                late_arrivals=Coalesce(Sum('late_count'), 0),
+                early_departures=Coalesce(Sum('early_count'), 0),
+                average_hours_per_day=Coalesce(Avg('working_hours'), Decimal('0')),
+                total_punch_cycles=Coalesce(Sum('cycle_count'), 0),
             )
-        }
+            return dict(ReportStatsSerializer(stats).data)
 
-        serializer = ReportStatsSerializer(stats)
-        return Response(serializer.data)
+        return Response(cached_report(
+            'overview', report_params(request), *date_range, build
+        ))
 
 class EmployeeReportsView(APIView):
     # permission_classes = [IsAuthenticated]
@@ -75,50 +150,58 @@ class EmployeeReportsView(APIView):
                 {'error': 'start_date and end_date are required'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
+        try:
+            date_range = parse_date_range(start_date, end_date)
+        except ValueError:
+            return Response(
+                {'error': 'start_date and end_date must be YYYY-MM-DD dates'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # Get employees with sessions in the date range
-        employees_query = Employee.objects.filter(
-            work_sessions__date__gte=start_date,
-            work_sessions__date__lte=end_date
-        ).distinct()
+        department = request.query_params.get('department')
 
+        rollups = DailyRollup.objects.filter(
+            date__gte=start_date,
+            date__lte=end_date
+        )
         if employee_id:
-            employees_query = employees_query.filter(id=employee_id)
-
-        employee_stats = []
-        
-        for employee in employees_query:
-            sessions = WorkSession.objects.filter(
-                employee=employee,
-                date__gte=start_date,
-                date__lte=end_date
-            )
-
-            total_hours = sessions.aggregate(total=Sum('working_hours'))['total'] or 0
-            sessions_count = sessions.count()
-            late_count = sessions.filter(is_late_in=True).count()
-            early_count = sessions.filter(is_early_out=True).count()
-            punch_cycles = sum(session.punch_cycles.count() for session in sessions)
-
-            stats = {
-                'employee_id': employee.id,
-                'employee_name': employee.name,
-                'department': employee.department,
-                'sessions': sessions_count,
-                'total_hours': total_hours,
-                'average_hours': total_hours / sessions_count if sessions_count > 0 else 0,
-                'late_count': late_count,
-                'early_count': early_count,
-                'punch_cycles': punch_cycles,
-                'attendance_rate': (
-                    ((sessions_count - late_count - early_count) / sessions_count) * 100
-                    if sessions_count > 0 else 0
+            rollups = rollups.filter(employee_id=employee_id)
+        if department:
+            rollups = rollups.filter(department=department)
+
+        if wants_series(request):
+            return series_response(request, 'employees', rollups, date_range, group_by='employee')
+
+        def build():
+            # One row per employee, grouped and derived in the database
+            employee_stats = rollups.order_by().values('employee_id').annotate(
+                employee_name=F('employee__name'),
+                department=F('employee__department'),
+                sessions=Sum('session_count'),
+                total_hours=Sum('working_hours'),
+                average_hours=Avg('working_hours'),
+                late_count=Sum('late_count'),
+                early_count=Sum('early_count'),
+                punch_cycles=Sum('cycle_count'),
+            ).annotate(
+                attendance_rate=ExpressionWrapper(
+                    Cast(F('sessions') - F('late_count') - F('early_count'), FloatField()) /
+                    Cast(F('sessions'), FloatField()) * 100,
+                    output_field=FloatField()
                 )
-            }
-            employee_stats.append(stats)
+            ).order_by('employee_name', 'employee_id')
+            return [dict(row) for row in EmployeeStatsSerializer(employee_stats, many=True).data]
 
-        serializer = EmployeeStatsSerializer(employee_stats, many=True)
-        return Response(serializer.data)
+        # Pages are cut from the cached list of every matching employee
+        employee_stats = cached_report(
+            'employees', report_params(request), *date_range, build
+        )
+        paginator = ReportPagination()
+        page = paginator.paginate_queryset(employee_stats, request, view=self)
+        if page is not None:
+            return paginator.get_paginated_response(page)
+
+        return Response(employee_stats)
 
 class DailyReportsView(APIView):
     # permission_classes = [IsAuthenticated]
@@ -134,38 +217,37 @@ class DailyReportsView(APIView):
                 {'error': 'start_date and end_date are required'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
+        try:
+            date_range = parse_date_range(start_date, end_date)
+        except ValueError:
+            return Response(
+                {'error': 'start_date and end_date must be YYYY-MM-DD dates'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # Get daily aggregated data
-        sessions = WorkSession.objects.filter(
+        rollups = DailyRollup.objects.filter(
             date__gte=start_date,
             date__lte=end_date
         )
 
         if employee_id:
-            sessions = sessions.filter(employee_id=employee_id)
-
-        # Group by date
-        daily_data = {}
-        for session in sessions:
-            date_str = session.date.isoformat()
-            if date_str not in daily_data:
-                daily_data[date_str] = {
-                    'date': session.date,
-                    'hours': 0,
-                    'sessions': 0,
-                    'cycles': 0
-                }
-            
-            daily_data[date_str]['hours'] += float(session.working_hours)
-            daily_data[date_str]['sessions'] += 1
-            daily_data[date_str]['cycles'] += session.punch_cycles.count()
-
-        # Convert to list and sort by date
-        daily_list = list(daily_data.values())
-        daily_list.sort(key=lambda x: x['date'])
-
-        serializer = DailyReportSerializer(daily_list, many=True)
-        return Response(serializer.data)
+            rollups = rollups.filter(employee_id=employee_id)
+
+        if wants_series(request):
+            return series_response(request, 'daily', rollups, date_range, granularity='day')
+
+        def build():
+            # Group by date in the database, rows come back sorted
+            daily_list = rollups.order_by().values('date').annotate(
+                hours=Sum('working_hours'),
+                sessions=Sum('session_count'),
+                cycles=Sum('cycle_count'),
+            ).order_by('date')
+            return [dict(row) for row in DailyReportSerializer(daily_list, many=True).data]
+
+        return Response(cached_report(
+            'daily', report_params(request), *date_range, build
+        ))
 
 class CSVExportView(APIView):
     # permission_classes = [IsAuthenticated]
@@ -182,72 +264,144 @@ class CSVExportView(APIView):
         employee_id = serializer.validated_data.get('employee_id')
         include_punch_cycles = serializer.validated_data['include_punch_cycles']
 
-        # Get work sessions
-        sessions = WorkSession.objects.filter(
-            date__gte=start_date,
-            date__lte=end_date
-        ).select_related('employee').prefetch_related('punch_cycles')
+        sessions = export_sessions(start_date, end_date, employee_id, include_punch_cycles)
 
-        if employee_id:
-            sessions = sessions.filter(employee_id=employee_id)
+        # Stream the CSV as sessions are read, one chunk at a time
+        return streaming_export_response(
+            request,
+            iter_csv(sessions, include_punch_cycles),
+            'text/csv',
+            f'timesheet-{start_date}-to-{end_date}.csv'
+        )
 
-        # Create CSV response
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="timesheet-{start_date}-to-{end_date}.csv"'
+class NDJSONExportView(APIView):
+    # permission_classes = [IsAuthenticated]
 
-        writer = csv.writer(response)
-        
-        # Write headers
-        headers = [
-            'Employee Name', 'Employee ID', 'Date', 'First Punch In', 
-            'Last Punch Out', 'Total Hours', 'Break Duration (min)', 
-            'Working Hours', 'Late Arrivals', 'Early Departures', 'Status'
-        ]
-        
-        if include_punch_cycles:
-            headers.append('Punch Cycles')
-        
-        writer.writerow(headers)
-
-        # Write data
-        for session in sessions:
-            punch_cycles_text = ''
-            if include_punch_cycles:
-                cycles = session.punch_cycles.all()
-                cycle_texts = []
-                for i, cycle in enumerate(cycles):
-                    cycle_text = f"Cycle {i+1}: {cycle.punch_in.strftime('%H:%M')}"
-                    if cycle.punch_out:
-                        cycle_text += f" - {cycle.punch_out.strftime('%H:%M')}"
-                    else:
-                        cycle_text += " - In Progress"
-                    
-                    if cycle.is_late_in:
-                        cycle_text += " (Late)"
-                    if cycle.is_early_out:
-                        cycle_text += " (Early)"
-                    
-                    cycle_texts.append(cycle_text)
-                
-                punch_cycles_text = '; '.join(cycle_texts)
-
-            row = [
-                session.employee.name,
-                session.employee.employee_id,
-                session.date.strftime('%Y-%m-%d'),
-                session.punch_in.strftime('%H:%M:%S') if session.punch_in else '',
-                session.punch_out.strftime('%H:%M:%S') if session.punch_out else '',
-                f"{session.total_hours:.2f}",
-                f"{session.break_duration:.0f}",
-                f"{session.working_hours:.2f}",
-                '1' if session.is_late_in else '0',
-                '1' if session.is_early_out else '0',
-                session.get_status_display()
-            ]
-            
-            if include_punch_cycles:
-                row.append(punch_cycles_text)
-            
-            writer.writerow(row)
-
-        return response
\ No newline at end of file
+    def post(self, request):
+        """Export work sessions as newline-delimited JSON, cycles nested"""
+        serializer = CSVExportSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        start_date = serializer.validated_data['start_date']
+        end_date = serializer.validated_data['end_date']
+        employee_id = serializer.validated_data.get('employee_id')
+        include_punch_cycles = serializer.validated_data['include_punch_cycles']
+
+        sessions = export_sessions(start_date, end_date, employee_id, include_punch_cycles)
+        return streaming_export_response(
+            request,
+            iter_ndjson(sessions, include_punch_cycles),
+            'application/x-ndjson',
+            f'timesheet-{start_date}-to-{end_date}.ndjson'
+        )
+
+
+class ExportJobCreateView(APIView):
+    # permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """Start a background export, or reuse an identical one"""
+        serializer = ExportJobCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        params = dict(serializer.validated_data)
+        params_hash = export_params_hash(params)
+
+        job = self._reusable_job(params, params_hash)
+        if job is not None:
+            return Response(
+                ExportJobSerializer(job, context={'request': request}).data,
+                status=status.HTTP_200_OK
+            )
+
+        with transaction.atomic():
+            job = ExportJob.objects.create(params_hash=params_hash, **params)
+            transaction.on_commit(lambda: generate_export.delay(str(job.pk)))
+
+        return Response(
+            ExportJobSerializer(job, context={'request': request}).data,
+            status=status.HTTP_202_ACCEPTED
+        )
+
+    def _reusable_job(self, params, params_hash):
+        """Latest live job with the same parameters whose data is still current"""
+        job = ExportJob.objects.filter(
+            params_hash=params_hash,
+            status__in=['pending', 'running', 'complete']
+        ).first()
+        if job is None:
+            return None
+        if job.status != 'complete':
+            # Jobs that stopped reporting progress are presumed lost
+            stale_after = timezone.now() - timedelta(seconds=settings.EXPORT_JOB_STALE_SECONDS)
+            return job if job.updated_at >= stale_after else None
+        # Sessions saved while the export ran may or may not be in its file
+        if data_changed_since(
+            params['start_date'], params['end_date'], params.get('employee_id'),
+            job.started_at, job.total_rows
+        ):
+            return None
+        return job
+
+class ExportJobDetailView(APIView):
+    # permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        """Status and progress of an export job"""
+        job = get_object_or_404(ExportJob, pk=pk)
+        return Response(ExportJobSerializer(job, context={'request': request}).data)
+
+class ExportJobDownloadView(APIView):
+    # permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        """Download a finished export, honouring single HTTP byte ranges"""
+        job = get_object_or_404(ExportJob, pk=pk)
+        if job.status != 'complete' or not job.file:
+            return Response(
+                {'error': f'Export is {job.status}'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        _, content_type = EXPORT_FORMATS[job.format]
+        filename = f'timesheet-{job.start_date}-to-{job.end_date}.{job.format}'
+        etag = f'"{job.pk}-{job.file_size}"'
+        size = job.file_size
+
+        byte_range = parse_byte_range(request.headers.get('Range'), size)
+        if_range = request.headers.get('If-Range')
+        if if_range and if_range != etag:
+            byte_range = None
+
+        if byte_range is False:
+            response = Response(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        handle = job.file.open('rb')
+        if byte_range is None:
+            response = FileResponse(handle, as_attachment=True, filename=filename, content_type=content_type)
+            response['Content-Length'] = size
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                iter_file_range(handle, start, end),
+                status=status.HTTP_206_PARTIAL_CONTENT,
+                content_type=content_type
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = end - start + 1
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['Accept-Ranges'] = 'bytes'
+        response['ETag'] = etag
+        return response
+
+class ReportCacheStatsView(APIView):
+    # permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Hit and miss counters of the report cache"""
+        return Response(report_cache_stats())
@@ -0,0 +1,55 @@
+"""API renderers.
+
+FastJSONRenderer produces the same JSON as DRF's JSONRenderer with orjson,
+which encodes dicts, lists, strings, UUIDs and dates natively instead of
+through Python-level fallbacks. Values orjson has no native form for that
+matches DRF (datetimes, which DRF trims to milliseconds, Decimals, lazy
+strings and so on) go through DRF's encoder, so switching renderers does
+not change any payload.
+
+MessagePackRenderer is an opt-in compact binary encoding for internal
+clients, chosen with ``Accept: application/msgpack`` or ``?format=msgpack``.
+"""
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+_drf_encoder = encoders.JSONEncoder()
+
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value):
+    return _drf_encoder.default(value)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """DRF-compatible JSON rendered with orjson"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        # Pretty printing (the browsable API, ?indent=) keeps DRF's formatting
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+        # Like DRF, escape U+2028 and U+2029 so the output is a JavaScript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Compact binary responses, values typed as in the JSON responses"""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_default, use_bin_type=True, datetime=False)
@@ -121,23 +121,26 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework configuration
 REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
-    ],
-    'DEFAULT_PERMISSION_CLASSES': [
-        'rest_framework.permissions.IsAuthenticated',
-    ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 50,
-    'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-    ],
-    'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
-    ],
+    'DEFAULT_AUTHENTICATION_CLASSES': (
+        'rest_framework_simplejwt.authentication.JWTAuthentication',
+    ),
+    # JSON stays the default; MessagePack only when a client asks for it
+    'DEFAULT_RENDERER_CLASSES': (
+        'timetracker_project.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'timetracker_project.renderers.MessagePackRenderer',
+    ),
 }
 
+# Keyset pagination of the entry and session lists: rows per page, and the
+# cap on ?page_size= so a single response stays bounded
+KEYSET_PAGE_SIZE = config('KEYSET_PAGE_SIZE', default=50, cast=int)
+KEYSET_MAX_PAGE_SIZE = config('KEYSET_MAX_PAGE_SIZE', default=500, cast=int)
+
+# Ranked employee search: results returned by default, and the cap on ?limit=
+EMPLOYEE_SEARCH_LIMIT = config('EMPLOYEE_SEARCH_LIMIT', default=20, cast=int)
+EMPLOYEE_SEARCH_MAX_LIMIT = config('EMPLOYEE_SEARCH_MAX_LIMIT', default=100, cast=int)
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = config(
     'CORS_ALLOWED_ORIGINS',
@@ -161,13 +164,53 @@ CORS_ALLOW_CREDENTIALS = True
 #     STATIC_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/static/'
 #     MEDIA_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/media/'
 
-# # Celery Configuration (for background tasks)
-# CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379/0')
-# CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://localhost:6379/0')
-# CELERY_ACCEPT_CONTENT = ['json']
-# CELERY_TASK_SERIALIZER = 'json'
-# CELERY_RESULT_SERIALIZER = 'json'
-# CELERY_TIMEZONE = TIME_ZONE
+# Cache: Redis when REDIS_URL is set, shared by every worker process;
+# otherwise a per-process in-memory cache (tests, single-process runs)
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Time tracking
+# Rows per batch when streaming entries and writing sessions in bulk recomputes
+SESSION_RECOMPUTE_BATCH_SIZE = config('SESSION_RECOMPUTE_BATCH_SIZE', default=500, cast=int)
+# Largest batch accepted by the bulk punch endpoint
+BULK_PUNCH_MAX_ITEMS = config('BULK_PUNCH_MAX_ITEMS', default=1000, cast=int)
+# Seconds a process may serve its cached business hours without reloading
+BUSINESS_HOURS_CACHE_TTL = config('BUSINESS_HOURS_CACHE_TTL', default=300, cast=int)
+
+# Recompute work sessions in a Celery task instead of during the punch request
+SESSION_RECOMPUTE_ASYNC = config('SESSION_RECOMPUTE_ASYNC', default=False, cast=bool)
+# Punches for the same employee-day within this many seconds share one recompute
+SESSION_RECOMPUTE_COALESCE_SECONDS = config('SESSION_RECOMPUTE_COALESCE_SECONDS', default=5, cast=int)
+
+# Seconds a cached report result is kept; results are also bypassed as soon
+# as a session in their date range is saved
+REPORT_CACHE_TTL = config('REPORT_CACHE_TTL', default=3600, cast=int)
+# Seconds without progress after which a pending or running export job is
+# no longer reused for identical requests
+EXPORT_JOB_STALE_SECONDS = config('EXPORT_JOB_STALE_SECONDS', default=600, cast=int)
+
+# Celery Configuration (for background tasks)
+CELERY_BROKER_URL = REDIS_URL or 'redis://localhost:6379/0'
+CELERY_RESULT_BACKEND = REDIS_URL or 'redis://localhost:6379/0'
+CELERY_ACCEPT_CONTENT = ['json']
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_RESULT_SERIALIZER = 'json'
+CELERY_TIMEZONE = TIME_ZONE
+# Run tasks in-process, for tests and single-node deployments without a worker
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=False, cast=bool)
+CELERY_TASK_EAGER_PROPAGATES = True
 
 # Logging
 LOGGING = {
@@ -212,13 +255,6 @@ if not DEBUG:
 
 AUTH_USER_MODEL = 'employees.CustomUser'
 
-REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
-}
-
-
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=3650),  # 10 years
     'ROTATE_REFRESH_TOKENS': False,
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import TimeEntry, WorkSession, PunchCycle
+from .models import TimeEntry, WorkSession, PunchCycle, WorkStatus
+from .local_calendar import local_date
+from .utils import TimeCalculationService
 
 @admin.register(TimeEntry)
 class TimeEntryAdmin(admin.ModelAdmin):
@@ -10,6 +12,31 @@ class TimeEntryAdmin(admin.ModelAdmin):
     readonly_fields = ('id', 'created_at', 'updated_at')
     date_hierarchy = 'timestamp'
 
+    # Edited entries no longer match their sessions, recompute the days they
+    # touch in full
+
+    def save_model(self, request, obj, form, change):
+        days = [(obj.employee, local_date(obj.timestamp))]
+        if change:
+            previous = TimeEntry.objects.select_related('employee').get(pk=obj.pk)
+            days.append((previous.employee, local_date(previous.timestamp)))
+        TimeCalculationService().edit_time_entries(
+            days, lambda: super(TimeEntryAdmin, self).save_model(request, obj, form, change)
+        )
+
+    def delete_model(self, request, obj):
+        TimeCalculationService().edit_time_entries(
+            [(obj.employee, local_date(obj.timestamp))],
+            lambda: super(TimeEntryAdmin, self).delete_model(request, obj)
+        )
+
+    def delete_queryset(self, request, queryset):
+        entries = list(queryset.select_related('employee'))
+        TimeCalculationService().edit_time_entries(
+            [(entry.employee, local_date(entry.timestamp)) for entry in entries],
+            lambda: super(TimeEntryAdmin, self).delete_queryset(request, queryset)
+        )
+
 @admin.register(WorkSession)
 class WorkSessionAdmin(admin.ModelAdmin):
     list_display = ('employee', 'date', 'working_hours', 'break_duration', 'status', 'is_late_in', 'is_early_out')
@@ -25,4 +52,12 @@ class PunchCycleAdmin(admin.ModelAdmin):
     list_filter = ('is_late_in', 'is_early_out', 'punch_in')
     search_fields = ('work_session__employee__name',)
     ordering = ('-punch_in',)
-    readonly_fields = ('id', 'duration_hours', 'created_at', 'updated_at')
\ No newline at end of file
+    readonly_fields = ('id', 'duration_hours', 'created_at', 'updated_at')
+
+@admin.register(WorkStatus)
+class WorkStatusAdmin(admin.ModelAdmin):
+    list_display = ('employee', 'work_date', 'current_status', 'last_entry', 'updated_at')
+    list_filter = ('current_status', 'work_date')
+    search_fields = ('employee__name', 'employee__employee_id')
+    ordering = ('-work_date', 'employee__name')
+    readonly_fields = ('updated_at',)
\ No newline at end of file
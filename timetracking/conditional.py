@@ -0,0 +1,105 @@
+"""Conditional GET for the endpoints the front-end polls.
+
+A response's validators are derived from a query far cheaper than the
+response itself: the row count and latest ``updated_at`` of an unpaged list,
+the keys and ``updated_at`` of the rows on a keyset page (bounded by the page
+size, where aggregating the whole list would not be), or the ``updated_at`` of
+an employee's live WorkStatus row. The responses embed the employee's name
+and details, so the employee's ``updated_at`` is part of each of them too.
+A client that sends the ETag (or Last-Modified) back gets a 304 without the
+list being queried or serialized again.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .local_calendar import local_today
+from .models import WorkStatus
+
+
+def make_etag(request, *parts):
+    """Quoted ETag over ``parts`` and the negotiated media type"""
+    parts += (getattr(request, 'accepted_media_type', ''),)
+    digest = hashlib.blake2b('|'.join(map(str, parts)).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def list_validators(request, queryset):
+    """(etag, last_modified) of a filtered list from its count and max(updated_at)"""
+    row = queryset.select_related(None).prefetch_related(None).order_by().aggregate(
+        count=Count('*'), last_modified=Max('updated_at'), employee_modified=Max('employee__updated_at')
+    )
+    modified = [row['last_modified'], row['employee_modified']]
+    last_modified = max((value for value in modified if value is not None), default=None)
+    return make_etag(
+        request, row['count'], *(value and value.isoformat() for value in modified)
+    ), last_modified
+
+
+def page_validators(request, page_queryset):
+    """(etag, last_modified) of a keyset page from its rows' keys and updated_at"""
+    rows = list(page_queryset.select_related(None).prefetch_related(None).values_list(
+        'pk', 'updated_at', 'employee__updated_at'
+    ))
+    last_modified = max((max(modified) for _, *modified in rows), default=None)
+    return make_etag(request, *(
+        f'{pk}@{updated_at.isoformat()}@{employee_updated_at.isoformat()}'
+        for pk, updated_at, employee_updated_at in rows
+    )), last_modified
+
+
+def work_status_validators(request, employee_id):
+    """(etag, last_modified) of an employee's live status, None when there is none.
+
+    The status resets when the Chicago day changes, so today's date is part
+    of the ETag as well.
+    """
+    row = WorkStatus.objects.filter(
+        employee_id=employee_id, employee__is_active=True
+    ).values_list('updated_at', 'last_entry__updated_at', 'employee__updated_at').first()
+    if row is None:
+        return None
+    last_modified = max(value for value in row if value is not None)
+    return make_etag(request, local_today(), *row), last_modified
+
+
+def conditional_response(request, validators, respond):
+    """304 when the client's validators still match, else ``respond()``.
+
+    Fresh 200 responses carry the validators and ask clients to revalidate
+    on every use, which is what turns polling into conditional requests.
+    """
+    if validators is None:
+        return respond()
+
+    etag, last_modified = validators
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = respond()
+        if response.status_code != 200:
+            return response
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    patch_cache_control(response, private=True, no_cache=True)
+    # The representation, and so the ETag, depends on the negotiated renderer
+    patch_vary_headers(response, ('Accept',))
+    return response
+
+
+class ConditionalListMixin:
+    """ETag / Last-Modified validators for a viewset's list action"""
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        get_page_queryset = getattr(self.paginator, 'get_page_queryset', None)
+        if get_page_queryset is not None:
+            validators = page_validators(request, get_page_queryset(queryset, request, self))
+        else:
+            validators = list_validators(request, queryset)
+        return conditional_response(
+            request, validators, lambda: super(ConditionalListMixin, self).list(request, *args, **kwargs)
+        )
@@ -0,0 +1,237 @@
+"""Pure-Python work session engine.
+
+The engine works on a sorted list of lightweight entry records for one
+employee-day and derives everything a WorkSession needs in memory, so it can
+be exercised without a database.
+"""
+from collections import namedtuple
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+
+EntryRecord = namedtuple('EntryRecord', ['id', 'type', 'timestamp', 'is_late', 'is_early'])
+
+# Columns to pass to ``values_list`` so rows can be turned into EntryRecords
+ENTRY_RECORD_FIELDS = EntryRecord._fields
+
+# Legal (status, entry type) transitions of a well-formed day
+TRANSITIONS = {
+    ('complete', 'punch_in'): 'in_progress',
+    ('in_progress', 'break_start'): 'on_break',
+    ('on_break', 'break_end'): 'in_progress',
+    ('in_progress', 'punch_out'): 'complete',
+}
+
+
+@dataclass
+class CycleResult:
+    """A computed punch in/out cycle"""
+    punch_in: object
+    punch_out: object = None
+    is_late_in: bool = False
+    is_early_out: bool = False
+    duration_hours: Decimal = Decimal('0')
+    break_minutes: Decimal = Decimal('0')
+    break_time: timedelta = timedelta(0)
+
+
+@dataclass
+class SessionResult:
+    """Computed values for a single employee-day"""
+    punch_in: object = None
+    punch_out: object = None
+    break_start: object = None
+    break_end: object = None
+    is_late_in: bool = False
+    is_early_out: bool = False
+    total_hours: Decimal = Decimal('0')
+    working_hours: Decimal = Decimal('0')
+    break_duration: Decimal = Decimal('0')
+    status: str = 'complete'
+    cycles: list = field(default_factory=list)
+    counts: dict = field(default_factory=dict)
+    last_entry: EntryRecord = None
+    is_sequential: bool = False
+
+
+def hours_between(start, end):
+    return Decimal(str((end - start).total_seconds() / 3600))
+
+
+def minutes_between(start, end):
+    return minutes_of(end - start)
+
+
+def minutes_of(duration):
+    return Decimal(str(duration.total_seconds() / 60))
+
+
+def add_ongoing(working_hours, break_minutes, open_punch_in, open_break_start, now):
+    """Add an open cycle (and its open break, if any) counted up to ``now``
+    to the given totals."""
+    ongoing_break_minutes = Decimal('0')
+    if open_break_start is not None and open_break_start >= open_punch_in:
+        ongoing_break_minutes = minutes_between(open_break_start, now)
+    ongoing_hours = hours_between(open_punch_in, now)
+    return (
+        working_hours + max(Decimal('0'), ongoing_hours - (ongoing_break_minutes / 60)),
+        break_minutes + ongoing_break_minutes,
+    )
+
+
+def is_sequential(records):
+    """Whether ``records`` follow the legal transitions with strictly
+    increasing timestamps, so later entries can be applied incrementally."""
+    status, previous = 'complete', None
+    for record in records:
+        status = TRANSITIONS.get((status, record.type))
+        if status is None or (previous is not None and record.timestamp <= previous):
+            return False
+        previous = record.timestamp
+    return True
+
+
+def derive_work_status(is_punched_in, is_on_break, has_punched_out):
+    """Current status and allowed actions of an employee's day"""
+    if not is_punched_in:
+        return {
+            'can_punch_in': True,
+            'can_punch_out': False,
+            'can_start_break': False,
+            'can_end_break': False,
+            'current_status': 'finished' if has_punched_out else 'not_started',
+        }
+    elif is_on_break:
+        return {
+            'can_punch_in': False,
+            'can_punch_out': False,
+            'can_start_break': False,
+            'can_end_break': True,
+            'current_status': 'on_break',
+        }
+    return {
+        'can_punch_in': False,
+        'can_punch_out': True,
+        'can_start_break': True,
+        'can_end_break': False,
+        'current_status': 'working',
+    }
+
+
+def work_status_from_counts(counts):
+    """Status of a day from its per-type entry counts"""
+    return derive_work_status(
+        counts['punch_in'] > counts['punch_out'],
+        counts['break_start'] > counts['break_end'],
+        counts['punch_out'] > 0,
+    )
+
+
+def compute_session(records, now, is_today):
+    """Compute a work session from ``records`` sorted by timestamp.
+
+    ``now`` is the current time and ``is_today`` tells whether the records
+    belong to the current local work day, in which case an open cycle or
+    break is counted up to ``now``.
+    """
+    punch_ins, punch_outs, break_starts, break_ends = [], [], [], []
+    by_type = {
+        'punch_in': punch_ins,
+        'punch_out': punch_outs,
+        'break_start': break_starts,
+        'break_end': break_ends,
+    }
+    for record in records:
+        by_type[record.type].append(record)
+
+    result = SessionResult(
+        counts={entry_type: len(items) for entry_type, items in by_type.items()},
+        last_entry=records[-1] if records else None,
+        is_sequential=is_sequential(records),
+    )
+    if not records:
+        return result
+
+    if punch_ins:
+        result.punch_in = punch_ins[0].timestamp
+        result.is_late_in = punch_ins[0].is_late
+    if punch_outs:
+        result.punch_out = punch_outs[-1].timestamp
+        result.is_early_out = punch_outs[-1].is_early
+    if break_starts:
+        result.break_start = break_starts[0].timestamp
+    if break_ends:
+        result.break_end = break_ends[-1].timestamp
+
+    total_working_hours = Decimal('0')
+    total_break_minutes = Decimal('0')
+
+    # Cycles and breaks are paired by position, the n-th punch_out closes the
+    # n-th punch_in and the n-th break_end closes the n-th break_start.
+    for i, punch_in in enumerate(punch_ins):
+        punch_out = punch_outs[i] if i < len(punch_outs) else None
+        cycle = CycleResult(
+            punch_in=punch_in.timestamp,
+            punch_out=punch_out.timestamp if punch_out else None,
+            is_late_in=punch_in.is_late,
+            is_early_out=punch_out.is_early if punch_out else False,
+        )
+        result.cycles.append(cycle)
+        if punch_out is None:
+            # Completed breaks of the open cycle are only subtracted once it
+            # closes, keep them on the cycle until then
+            for j, break_start in enumerate(break_starts):
+                if break_start.timestamp >= punch_in.timestamp and j < len(break_ends):
+                    cycle.break_minutes += minutes_between(break_start.timestamp, break_ends[j].timestamp)
+                    cycle.break_time += break_ends[j].timestamp - break_start.timestamp
+            continue
+
+        cycle_hours = hours_between(punch_in.timestamp, punch_out.timestamp)
+        cycle.duration_hours = cycle_hours
+
+        cycle_break_minutes = Decimal('0')
+        for j, break_start in enumerate(break_starts):
+            if punch_in.timestamp <= break_start.timestamp <= punch_out.timestamp and j < len(break_ends):
+                break_end = break_ends[j]
+                if break_end.timestamp <= punch_out.timestamp:
+                    cycle_break_minutes += minutes_between(break_start.timestamp, break_end.timestamp)
+                    cycle.break_time += break_end.timestamp - break_start.timestamp
+
+        cycle.break_minutes = cycle_break_minutes
+        total_break_minutes += cycle_break_minutes
+        total_working_hours += max(Decimal('0'), cycle_hours - (cycle_break_minutes / 60))
+
+    is_punched_in = len(punch_ins) > len(punch_outs)
+    is_on_break = len(break_starts) > len(break_ends)
+
+    # Ongoing work (punched in but not out) counts up to now on the current day
+    if is_punched_in and is_today:
+        total_working_hours, total_break_minutes = add_ongoing(
+            total_working_hours,
+            total_break_minutes,
+            punch_ins[-1].timestamp,
+            break_starts[-1].timestamp if is_on_break else None,
+            now,
+        )
+
+    # Total hours span from the first punch in to the last punch out or now
+    if result.punch_in:
+        if result.punch_out:
+            total_duration = result.punch_out - result.punch_in
+        elif is_punched_in:
+            total_duration = now - result.punch_in
+        else:
+            total_duration = timedelta(0)
+        result.total_hours = Decimal(str(total_duration.total_seconds() / 3600))
+
+    result.working_hours = total_working_hours
+    result.break_duration = total_break_minutes
+
+    if not is_punched_in:
+        result.status = 'complete'
+    elif is_on_break:
+        result.status = 'on_break'
+    else:
+        result.status = 'in_progress'
+
+    return result
@@ -0,0 +1,165 @@
+"""Sparse fieldsets for list endpoints.
+
+``?fields=date,employee_name,working_hours`` picks the flat fields of a list
+and ``?expand=employee,punch_cycles`` adds nested objects. Either parameter
+switches the list to a flat path that reads ``values()`` rows instead of
+model instances and formats each column with the serializer's own field, so
+field introspection happens once per request rather than once per row and
+nested serializers, which are built per row, are skipped unless expanded.
+Lists requested without either parameter are serialized as before.
+"""
+from collections import defaultdict
+
+from django.db.models import Prefetch
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+
+def _identity(value):
+    return value
+
+
+class FlatSerializer:
+    """Serialize ``values()`` rows with the flat fields of a serializer.
+
+    Output matches the serializer for the same fields; foreign keys come out
+    as the raw primary key a ``values()`` row already holds.
+    """
+
+    def __init__(self, serializer, field_names=None):
+        fields = serializer.fields
+        if field_names is None:
+            field_names = flat_field_names(serializer)
+        self.columns = []
+        for name in field_names:
+            field = fields[name]
+            represent = _identity if isinstance(field, PrimaryKeyRelatedField) else field.to_representation
+            self.columns.append((name, field.source.replace('.', '__'), represent))
+
+    @property
+    def lookups(self):
+        return [lookup for _, lookup, _ in self.columns]
+
+    def to_representation(self, row):
+        data = {}
+        for name, lookup, represent in self.columns:
+            value = row[lookup]
+            data[name] = None if value is None else represent(value)
+        return data
+
+
+def flat_field_names(serializer):
+    """Readable fields of a serializer that are not nested serializers"""
+    return [
+        name for name, field in serializer.fields.items()
+        if not field.write_only and not isinstance(field, BaseSerializer)
+    ]
+
+
+class SparseFieldsetMixin:
+    """``?fields=`` and ``?expand=`` support for a viewset's list action.
+
+    ``expandable_fields`` maps expand names to nested serializer fields, e.g.
+    ``{'employee': 'employee_data'}``. Reverse relations are fetched with
+    the queryset of a matching ``Prefetch`` in ``get_queryset`` when there is
+    one, so expanded rows keep the order of the regular list.
+    """
+    expandable_fields = {}
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def list(self, request, *args, **kwargs):
+        fieldset = self.get_fieldset(request)
+        if fieldset is None:
+            return super().list(request, *args, **kwargs)
+
+        field_names, expand = fieldset
+        serializer = self.get_serializer()
+        flat = FlatSerializer(serializer, field_names)
+        queryset = self.filter_queryset(self.get_queryset())
+        prefetches = {
+            lookup.prefetch_to: lookup.queryset
+            for lookup in queryset._prefetch_related_lookups
+            if isinstance(lookup, Prefetch) and lookup.queryset is not None
+        }
+
+        # Keys the paginator and the expansions need come along unrendered
+        pk_name = queryset.model._meta.pk.attname
+        extra = [pk_name]
+        extra += [field.lstrip('-') for field in getattr(self, 'keyset_ordering', ())]
+        nested = [serializer.fields[self.expandable_fields[name]] for name in expand]
+        extra += [field.source for field in nested if self._relation(queryset.model, field).many_to_one]
+        rows = queryset.prefetch_related(None).values(*dict.fromkeys(flat.lookups + extra))
+
+        page = self.paginate_queryset(rows)
+        rows = list(rows) if page is None else page
+        data = [flat.to_representation(row) for row in rows]
+        if nested:
+            for field in nested:
+                self._expand(queryset.model, field, rows, data, prefetches.get(field.source))
+            # Keep the serializer's key order with the nested objects in place
+            order = [name for name in serializer.fields if name in data[0]] if data else []
+            data = [{name: item[name] for name in order} for item in data]
+
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def get_fieldset(self, request):
+        """Requested (flat field names, expand names), None for the full list"""
+        fields_param = request.query_params.get(self.fields_query_param)
+        expand_param = request.query_params.get(self.expand_query_param)
+        if fields_param is None and expand_param is None:
+            return None
+
+        available = flat_field_names(self.get_serializer())
+        field_names = _split(fields_param) if fields_param is not None else available
+        expand = _split(expand_param) if expand_param is not None else []
+        unknown = [name for name in field_names if name not in available]
+        if unknown:
+            raise ValidationError({self.fields_query_param: f'Unknown fields: {", ".join(unknown)}'})
+        unknown = [name for name in expand if name not in self.expandable_fields]
+        if unknown:
+            raise ValidationError({self.expand_query_param: f'Cannot expand: {", ".join(unknown)}'})
+        return field_names, expand
+
+    def _relation(self, model, field):
+        return model._meta.get_field(field.source)
+
+    def _expand(self, model, field, rows, data, base_queryset):
+        relation = self._relation(model, field)
+        related_model = relation.related_model
+        if base_queryset is None:
+            base_queryset = related_model._default_manager.all()
+
+        if isinstance(field, ListSerializer):
+            # Reverse foreign key: a list of children per row
+            child = FlatSerializer(field.child)
+            parent_attname = relation.field.attname
+            pk_name = model._meta.pk.attname
+            children = base_queryset.filter(
+                **{f'{parent_attname}__in': [row[pk_name] for row in rows]}
+            ).values(*dict.fromkeys(child.lookups + [parent_attname]))
+            grouped = defaultdict(list)
+            for child_row in children:
+                grouped[child_row[parent_attname]].append(child.to_representation(child_row))
+            for row, item in zip(rows, data):
+                item[field.field_name] = grouped.get(row[pk_name], [])
+        else:
+            # Forward foreign key: one object per row
+            related = FlatSerializer(field)
+            related_pk = related_model._meta.pk.attname
+            objects = {
+                related_row[related_pk]: related.to_representation(related_row)
+                for related_row in base_queryset.filter(
+                    pk__in={row[field.source] for row in rows}
+                ).values(*dict.fromkeys(related.lookups + [related_pk]))
+            }
+            for row, item in zip(rows, data):
+                item[field.field_name] = objects.get(row[field.source])
+
+
+def _split(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
@@ -0,0 +1,50 @@
+"""Local date range filtering shared by the list endpoints.
+
+``start_date`` and ``end_date`` query parameters are Chicago local dates.
+Time entries are matched on the half-open UTC range the local days cover,
+which the ``(employee, timestamp)`` and ``(timestamp, id)`` indexes can
+range scan; casting the column with ``timestamp__date`` hides it from both
+indexes and buckets entries by UTC day. Work session dates already are
+Chicago local dates and are compared directly.
+"""
+from datetime import datetime
+
+from rest_framework.exceptions import ValidationError
+
+from .local_calendar import ONE_DAY, local_midnight_utc
+
+
+def parse_local_date(value, name):
+    """A YYYY-MM-DD query parameter as a date, 400 when malformed"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValidationError({name: 'Date has wrong format. Use YYYY-MM-DD.'})
+
+
+def local_date_params(query_params, start_param='start_date', end_param='end_date'):
+    """Optional start and end local dates from the query string"""
+    start_date = query_params.get(start_param)
+    end_date = query_params.get(end_param)
+    return (
+        parse_local_date(start_date, start_param) if start_date else None,
+        parse_local_date(end_date, end_param) if end_date else None,
+    )
+
+
+def filter_local_timestamps(queryset, start_date=None, end_date=None, field='timestamp'):
+    """Rows whose ``field`` falls on Chicago local dates start_date..end_date"""
+    if start_date is not None:
+        queryset = queryset.filter(**{f'{field}__gte': local_midnight_utc(start_date)})
+    if end_date is not None:
+        queryset = queryset.filter(**{f'{field}__lt': local_midnight_utc(end_date + ONE_DAY)})
+    return queryset
+
+
+def filter_local_dates(queryset, start_date=None, end_date=None, field='date'):
+    """Rows whose local date ``field`` lies in start_date..end_date"""
+    if start_date is not None:
+        queryset = queryset.filter(**{f'{field}__gte': start_date})
+    if end_date is not None:
+        queryset = queryset.filter(**{f'{field}__lte': end_date})
+    return queryset
@@ -0,0 +1,55 @@
+"""Chicago local calendar helpers.
+
+Work days are Chicago local dates while timestamps are stored in UTC. Day
+boundaries are memoized per date, so DST is resolved once per day rather
+than once per timestamp, and a UTC timestamp's local date takes a cache
+lookup and a comparison.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from functools import lru_cache
+
+import pytz
+from django.utils import timezone
+
+CENTRAL_TZ = pytz.timezone('America/Chicago')
+
+ONE_DAY = timedelta(days=1)
+
+
+def to_local_chicago(dt):
+    """Convert UTC datetime to Chicago local time"""
+    if dt.tzinfo is None:
+        dt = timezone.make_aware(dt, timezone.utc)
+    return dt.astimezone(CENTRAL_TZ)
+
+
+@lru_cache(maxsize=4096)
+def local_midnight_utc(day):
+    """UTC instant at which the Chicago local ``day`` starts"""
+    return CENTRAL_TZ.localize(datetime.combine(day, time.min)).astimezone(dt_timezone.utc)
+
+
+def local_day_bounds(day):
+    """Half-open UTC range ``[start, end)`` covering the Chicago local ``day``"""
+    return local_midnight_utc(day), local_midnight_utc(day + ONE_DAY)
+
+
+def local_range_bounds(start_date, end_date):
+    """Half-open UTC range covering Chicago local dates start_date..end_date"""
+    return local_midnight_utc(start_date), local_midnight_utc(end_date + ONE_DAY)
+
+
+def local_date(dt):
+    """Chicago local date of an aware datetime"""
+    if dt.tzinfo is not dt_timezone.utc:
+        dt = dt.astimezone(dt_timezone.utc)
+    # Chicago midnight always falls on the same UTC date (05:00 or 06:00),
+    # so the local date is either the UTC date or the day before it
+    day = dt.date()
+    return day if dt >= local_midnight_utc(day) else day - ONE_DAY
+
+
+def local_today():
+    """Current Chicago local date"""
+    return local_date(timezone.now())
+
@@ -0,0 +1,43 @@
+"""Per employee-day serialization of session writes.
+
+Concurrent punches for the same employee and local date (double taps, two
+kiosks, a punch racing a recompute task) must not interleave their session
+and cycle writes. On PostgreSQL a transaction-scoped advisory lock keyed by
+the employee-day is taken; it is released on commit or rollback and never
+blocks work for other employees or other days. Other backends fall back to
+locking the employee row, which SQLite ignores since it serializes writers
+on its own.
+"""
+import hashlib
+
+from django.db import connection
+
+from employees.models import Employee
+
+# Namespace of the two-key advisory lock, keeps these locks apart from any
+# other advisory locks taken on the same database
+LOCK_NAMESPACE = 0x5E55
+
+
+def work_day_lock_key(employee_id, work_date):
+    """Stable signed 32-bit key for an employee-day"""
+    digest = hashlib.blake2b(
+        f'{employee_id}:{work_date.isoformat()}'.encode(), digest_size=4
+    ).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def lock_work_day(employee_id, work_date):
+    """Block until this transaction holds the lock of an employee-day.
+
+    Must be called inside ``transaction.atomic()``. Callers locking several
+    days should do so in a consistent (sorted) order to avoid deadlocks.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_advisory_xact_lock(%s, %s)',
+                [LOCK_NAMESPACE, work_day_lock_key(employee_id, work_date)]
+            )
+    else:
+        list(Employee.objects.select_for_update().filter(pk=employee_id).values_list('pk'))
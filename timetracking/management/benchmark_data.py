@@ -0,0 +1,56 @@
+"""Throwaway work sessions shared by the benchmark commands"""
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from employees.models import Employee
+from timetracking.local_calendar import CENTRAL_TZ
+from timetracking.models import PunchCycle, WorkSession
+
+BENCH_PREFIX = 'BENCH-'
+
+# Benchmark sessions are dated from here so real sessions stay out of the lists
+FIRST_DATE = date(2000, 1, 1)
+
+
+def seed_sessions(employee_count, days, cycles_per_session):
+    """Create BENCH- employees with a session per day from FIRST_DATE"""
+    employees = Employee.objects.bulk_create([
+        Employee(
+            name=f'Bench {i}',
+            employee_id=f'{BENCH_PREFIX}{i:05d}',
+            email=f'bench-{i}@example.com',
+            department='Bench',
+            position='Bench',
+        )
+        for i in range(employee_count)
+    ])
+    sessions, cycles = [], []
+    for employee in employees:
+        for day in range(days):
+            work_date = FIRST_DATE + timedelta(days=day)
+            start = CENTRAL_TZ.localize(datetime.combine(work_date, time(8)))
+            work_session = WorkSession(
+                employee=employee,
+                date=work_date,
+                punch_in=start,
+                punch_out=start + timedelta(hours=8),
+                working_hours=Decimal('7.50'),
+                break_duration=Decimal('30.00'),
+            )
+            sessions.append(work_session)
+            for cycle in range(cycles_per_session):
+                punch_in = start + timedelta(hours=4 * cycle)
+                cycles.append(PunchCycle(
+                    work_session=work_session,
+                    punch_in=punch_in,
+                    punch_out=punch_in + timedelta(hours=4),
+                    duration_hours=Decimal('4.00'),
+                ))
+    WorkSession.objects.bulk_create(sessions, batch_size=1000)
+    PunchCycle.objects.bulk_create(cycles, batch_size=1000)
+    return employees
+
+
+def delete_seeded():
+    """Remove the BENCH- employees, their sessions and cycles"""
+    Employee.objects.filter(employee_id__startswith=BENCH_PREFIX).delete()
@@ -0,0 +1,60 @@
+import random
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from time import perf_counter
+
+import pytz
+from django.core.management.base import BaseCommand
+
+from timetracking.local_calendar import (
+    CENTRAL_TZ, local_date, local_day_bounds, local_midnight_utc, to_local_chicago
+)
+
+
+class Command(BaseCommand):
+    help = 'Compare the local calendar helpers with per-call pytz conversions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--timestamps', type=int, default=200000, help='Timestamps to convert')
+        parser.add_argument('--days', type=int, default=365, help='Days the timestamps are spread over')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        span = options['days'] * 86400
+        timestamps = [start + timedelta(seconds=rng.randrange(span)) for _ in range(options['timestamps'])]
+        local_midnight_utc.cache_clear()
+
+        # UTC -> local date, once per timestamp as the bulk recompute does
+        started = perf_counter()
+        expected = [to_local_chicago(ts).date() for ts in timestamps]
+        pytz_seconds = perf_counter() - started
+
+        started = perf_counter()
+        dates = [local_date(ts) for ts in timestamps]
+        local_date_seconds = perf_counter() - started
+
+        if dates != expected:
+            self.stderr.write(self.style.ERROR('local_date disagrees with to_local_chicago'))
+            return
+
+        # Local date -> UTC range, looked up once per timestamp as nested loops do
+        started = perf_counter()
+        for day in expected:
+            CENTRAL_TZ.localize(datetime.combine(day, time.min)).astimezone(pytz.UTC)
+            CENTRAL_TZ.localize(datetime.combine(day, time.max)).astimezone(pytz.UTC)
+        localize_seconds = perf_counter() - started
+
+        started = perf_counter()
+        for day in expected:
+            local_day_bounds(day)
+        bounds_seconds = perf_counter() - started
+
+        self._report('UTC -> local date', len(timestamps), pytz_seconds, local_date_seconds)
+        self._report('local date -> UTC range', len(expected), localize_seconds, bounds_seconds)
+
+    def _report(self, label, count, before, after):
+        self.stdout.write(
+            f'{label}: {count} lookups, per-call pytz {before * 1000:.1f} ms, '
+            f'local calendar {after * 1000:.1f} ms ({before / after:.1f}x faster)'
+        )
@@ -0,0 +1,70 @@
+import gzip
+import json
+from time import perf_counter
+
+import msgpack
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+
+from timetracker_project.renderers import FastJSONRenderer, MessagePackRenderer
+from timetracking.management.benchmark_data import delete_seeded, seed_sessions
+from timetracking.models import PunchCycle, WorkSession
+from timetracking.serializers import WorkSessionSerializer
+
+RENDERERS = [
+    ('DRF JSONRenderer', JSONRenderer()),
+    ('FastJSONRenderer', FastJSONRenderer()),
+    ('MessagePackRenderer', MessagePackRenderer()),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure encode time and payload size of a work session list response '
+        'for each renderer. Creates throwaway BENCH- employees and removes them '
+        'afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=500)
+        parser.add_argument('--days', type=int, default=20, help='Sessions per employee')
+        parser.add_argument('--cycles', type=int, default=2, help='Punch cycles per session')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per renderer, the best is reported')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark employees and their data')
+
+    def handle(self, *args, **options):
+        delete_seeded()
+        try:
+            employees = seed_sessions(options['employees'], options['days'], options['cycles'])
+            sessions = WorkSession.objects.filter(employee__in=employees).select_related(
+                'employee'
+            ).prefetch_related(
+                Prefetch('punch_cycles', queryset=PunchCycle.objects.order_by('-created_at'))
+            ).order_by('-date', '-id')
+            data = WorkSessionSerializer(sessions, many=True).data
+        finally:
+            if not options['keep']:
+                delete_seeded()
+
+        payloads = {}
+        for label, renderer in RENDERERS:
+            best = None
+            for _ in range(options['repeat']):
+                started = perf_counter()
+                payload = renderer.render(data, renderer.media_type)
+                elapsed = perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            payloads[label] = payload
+            self.stdout.write(
+                f'{label}: {best * 1000:.1f} ms, {len(payload):,} bytes, '
+                f'{len(gzip.compress(payload)):,} bytes gzipped'
+            )
+
+        # Every encoding has to carry the same data
+        if payloads['FastJSONRenderer'] != payloads['DRF JSONRenderer']:
+            raise CommandError('FastJSONRenderer output differs from JSONRenderer')
+        expected = json.loads(payloads['DRF JSONRenderer'])
+        if msgpack.unpackb(payloads['MessagePackRenderer']) != expected:
+            raise CommandError('MessagePackRenderer output differs from JSONRenderer')
+        self.stdout.write(f'{len(data)} sessions, encodings agree')
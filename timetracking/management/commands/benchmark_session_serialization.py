@@ -0,0 +1,61 @@
+from datetime import timedelta
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from timetracking.management.benchmark_data import FIRST_DATE, delete_seeded, seed_sessions
+from timetracking.views import WorkSessionViewSet
+
+# (label, query parameters) of each measured variant
+VARIANTS = [
+    ('full serializer', {}),
+    ('flat, expand=employee,punch_cycles', {'expand': 'employee,punch_cycles'}),
+    ('flat, fields=date,employee_name,working_hours', {'fields': 'date,employee_name,working_hours'}),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure work session list serialization in rows/sec, the full nested '
+        'serializer against the ?fields= / ?expand= flat path. Creates throwaway '
+        'BENCH- employees and removes them afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=100)
+        parser.add_argument('--days', type=int, default=20, help='Sessions per employee')
+        parser.add_argument('--cycles', type=int, default=2, help='Punch cycles per session')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per variant, the best is reported')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark employees and their data')
+
+    def handle(self, *args, **options):
+        delete_seeded()
+        try:
+            employees = seed_sessions(options['employees'], options['days'], options['cycles'])
+            # One unpaged list of every benchmark session per request
+            view = WorkSessionViewSet.as_view({'get': 'list'}, pagination_class=None)
+            factory = RequestFactory()
+            dates = {
+                'start_date': FIRST_DATE.isoformat(),
+                'end_date': (FIRST_DATE + timedelta(days=options['days'] - 1)).isoformat(),
+            }
+
+            for label, params in VARIANTS:
+                best, rows = None, 0
+                for _ in range(options['repeat']):
+                    request = factory.get('/', {**params, **dates})
+                    started = perf_counter()
+                    response = view(request)
+                    rows = len(response.data)
+                    elapsed = perf_counter() - started
+                    best = elapsed if best is None else min(best, elapsed)
+                self.stdout.write(
+                    f'{label}: {rows} rows in {best * 1000:.1f} ms, {rows / best:,.0f} rows/sec'
+                )
+            self.stdout.write(
+                f'{len(employees)} employees; times include the queries, not JSON rendering'
+            )
+        finally:
+            if not options['keep']:
+                delete_seeded()
@@ -0,0 +1,197 @@
+import random
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from employees.models import Employee
+from timetracking.engine import compute_session
+from timetracking.local_calendar import CENTRAL_TZ, local_today
+from timetracking.models import PunchCycle, WorkSession
+from timetracking.utils import CENTS, TimeCalculationService
+
+STRESS_PREFIX = 'STRESS-'
+
+# Entry types of a day, repeated as needed
+DAY_PATTERN = ['punch_in', 'break_start', 'break_end', 'punch_out']
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire concurrent punches at the synchronous punch path and verify the '
+        'resulting sessions. Creates throwaway STRESS- employees and removes '
+        'them afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=50)
+        parser.add_argument('--punches', type=int, default=10, help='Punches per employee')
+        parser.add_argument(
+            '--workers',
+            default='1,32',
+            help='Comma-separated thread counts, one run per count',
+        )
+        parser.add_argument(
+            '--double-tap',
+            type=float,
+            default=0.1,
+            help='Share of punches sent twice at the same moment',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--keep', action='store_true', help='Keep the stress employees and their data')
+
+    def handle(self, *args, **options):
+        try:
+            worker_counts = [int(count) for count in options['workers'].split(',')]
+        except ValueError:
+            raise CommandError('--workers must be a comma-separated list of integers')
+
+        if connection.vendor == 'sqlite' and max(worker_counts) > 1:
+            self.stdout.write(self.style.WARNING(
+                'SQLite fails concurrent writers with "database is locked", '
+                'run concurrent stress tests against PostgreSQL'
+            ))
+
+        rng = random.Random(options['seed'])
+        Employee.objects.filter(employee_id__startswith=STRESS_PREFIX).delete()
+        employees = Employee.objects.bulk_create([
+            Employee(
+                name=f'Stress {i}',
+                employee_id=f'{STRESS_PREFIX}{i:05d}',
+                email=f'stress-{i}@example.com',
+                department='Stress',
+                position='Stress',
+            )
+            for i in range(options['employees'])
+        ])
+
+        failed = False
+        try:
+            # Verification compares against a full recompute, so keep the
+            # session writes in the request
+            with override_settings(SESSION_RECOMPUTE_ASYNC=False):
+                for run, workers in enumerate(worker_counts):
+                    work_date = local_today() - timedelta(days=run + 1)
+                    punches = self._build_punches(employees, work_date, options, rng)
+                    stats = self._run(punches, workers)
+                    problems = self._verify(employees, work_date)
+                    failed = failed or bool(problems) or bool(stats['errors'])
+                    self._report(work_date, workers, len(punches), stats, problems)
+        finally:
+            if not options['keep']:
+                Employee.objects.filter(employee_id__startswith=STRESS_PREFIX).delete()
+
+        if failed:
+            raise CommandError('Stress run produced errors or inconsistent sessions')
+
+    def _build_punches(self, employees, work_date, options, rng):
+        """Every employee's day, shuffled together, with some punches doubled"""
+        start = CENTRAL_TZ.localize(datetime.combine(work_date, time(8)))
+        punches = []
+        for employee in employees:
+            for i in range(options['punches']):
+                punch = (employee.pk, DAY_PATTERN[i % len(DAY_PATTERN)], start + timedelta(minutes=7 * i))
+                punches.append(punch)
+                if rng.random() < options['double_tap']:
+                    punches.append(punch)
+        rng.shuffle(punches)
+        return punches
+
+    def _run(self, punches, workers):
+        barrier = threading.Barrier(workers)
+        lock = threading.Lock()
+        latencies, errors = [], Counter()
+
+        def punch_worker(chunk):
+            service = TimeCalculationService()
+            barrier.wait()
+            try:
+                for employee_id, entry_type, timestamp in chunk:
+                    started = perf_counter()
+                    try:
+                        service.create_time_entry(employee_id, entry_type, timestamp)
+                    except Exception as e:
+                        with lock:
+                            errors[type(e).__name__] += 1
+                        continue
+                    elapsed = perf_counter() - started
+                    with lock:
+                        latencies.append(elapsed)
+            finally:
+                connection.close()
+
+        started = perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(punch_worker, [punches[i::workers] for i in range(workers)]))
+        elapsed = perf_counter() - started
+
+        latencies.sort()
+        return {
+            'seconds': elapsed,
+            'throughput': len(latencies) / elapsed if elapsed else 0,
+            'p50_ms': self._percentile(latencies, 0.50) * 1000,
+            'p99_ms': self._percentile(latencies, 0.99) * 1000,
+            'errors': errors,
+        }
+
+    def _percentile(self, values, fraction):
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(len(values) * fraction))]
+
+    def _verify(self, employees, work_date):
+        """Compare stored sessions and cycles with a fresh recompute"""
+        service = TimeCalculationService()
+        problems = []
+        sessions = WorkSession.objects.filter(employee__in=employees, date=work_date)
+        duplicated = sessions.values('employee_id').annotate(
+            count=models.Count('id')
+        ).filter(count__gt=1)
+        for row in duplicated:
+            problems.append(f'{row["employee_id"]}: {row["count"]} sessions')
+
+        stored = {session.employee_id: session for session in sessions}
+        for employee in employees:
+            records = service._load_entry_records(employee, work_date)
+            work_session = stored.get(employee.pk)
+            if work_session is None:
+                if records:
+                    problems.append(f'{employee.employee_id}: missing session')
+                continue
+
+            expected = compute_session(records, timezone.now(), False)
+            mismatched = [
+                name for name, value in (
+                    ('status', expected.status),
+                    ('punch_in', expected.punch_in),
+                    ('punch_out', expected.punch_out),
+                    ('working_hours', expected.working_hours.quantize(CENTS)),
+                    ('break_duration', expected.break_duration.quantize(CENTS)),
+                )
+                if getattr(work_session, name) != value
+            ]
+            cycles = list(PunchCycle.objects.filter(work_session=work_session).values_list('punch_in', flat=True))
+            if sorted(cycles) != [cycle.punch_in for cycle in expected.cycles]:
+                mismatched.append('punch_cycles')
+            if mismatched:
+                problems.append(f'{employee.employee_id}: {", ".join(mismatched)} differ from a recompute')
+        return problems
+
+    def _report(self, work_date, workers, punches, stats, problems):
+        self.stdout.write(
+            f'{work_date} workers={workers} punches={punches} '
+            f'{stats["seconds"]:.2f}s {stats["throughput"]:.1f} punches/s '
+            f'p50={stats["p50_ms"]:.1f}ms p99={stats["p99_ms"]:.1f}ms'
+        )
+        for name, count in stats['errors'].items():
+            self.stdout.write(self.style.ERROR(f'  {count} x {name}'))
+        for problem in problems[:20]:
+            self.stdout.write(self.style.ERROR(f'  {problem}'))
+        if not stats['errors'] and not problems:
+            self.stdout.write(self.style.SUCCESS('  sessions consistent'))
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from timetracking.utils import TimeCalculationService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the live work status of every employee from the time entry log'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.SESSION_RECOMPUTE_BATCH_SIZE,
+            help='Rows per batch when reading entries and writing statuses',
+        )
+
+    def handle(self, *args, **options):
+        count = TimeCalculationService().rebuild_work_statuses(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt work status for {count} employees'))
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("timetracking", "0002_worksession_note"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="punchcycle",
+            name="break_minutes",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=6),
+        ),
+        migrations.AddField(
+            model_name="worksession",
+            name="last_entry_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
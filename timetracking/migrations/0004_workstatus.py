@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0001_initial"),
+        ("timetracking", "0003_incremental_session_state"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WorkStatus",
+            fields=[
+                (
+                    "employee",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="work_status",
+                        serialize=False,
+                        to="employees.employee",
+                    ),
+                ),
+                ("work_date", models.DateField()),
+                (
+                    "current_status",
+                    models.CharField(
+                        choices=[
+                            ("not_started", "Not Started"),
+                            ("working", "Working"),
+                            ("on_break", "On Break"),
+                            ("finished", "Finished"),
+                        ],
+                        default="not_started",
+                        max_length=20,
+                    ),
+                ),
+                ("can_punch_in", models.BooleanField(default=True)),
+                ("can_punch_out", models.BooleanField(default=False)),
+                ("can_start_break", models.BooleanField(default=False)),
+                ("can_end_break", models.BooleanField(default=False)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "last_entry",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="timetracking.timeentry",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Work Statuses",
+            },
+        ),
+    ]
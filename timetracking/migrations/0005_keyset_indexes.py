@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("timetracking", "0004_workstatus"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="timeentry",
+            index=models.Index(
+                fields=["timestamp", "id"], name="timetrackin_timesta_451ffa_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="worksession",
+            index=models.Index(
+                fields=["date", "id"], name="timetrackin_date_16a13e_idx"
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="timeentry",
+            name="timetrackin_timesta_072035_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="worksession",
+            name="timetrackin_date_80a60d_idx",
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("timetracking", "0005_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="timeentry",
+            index=models.Index(
+                fields=["employee", "timestamp", "id", "updated_at"],
+                name="timetrackin_employe_fb8588_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="timeentry",
+            index=models.Index(
+                fields=["timestamp", "id", "updated_at"],
+                name="timetrackin_timesta_06da83_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="worksession",
+            index=models.Index(
+                fields=["employee", "date", "id", "updated_at"],
+                name="timetrackin_employe_420e14_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="worksession",
+            index=models.Index(
+                fields=["date", "id", "updated_at"], name="timetrackin_date_8432c8_idx"
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="timeentry",
+            name="timetrackin_employe_2dfbed_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="timeentry",
+            name="timetrackin_timesta_451ffa_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="worksession",
+            name="timetrackin_employe_9f32e0_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="worksession",
+            name="timetrackin_date_16a13e_idx",
+        ),
+    ]
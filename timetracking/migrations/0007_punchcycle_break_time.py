@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:11
+
+import datetime
+from django.db import migrations, models
+
+
+def reset_incremental_state(apps, schema_editor):
+    # Existing cycles only have rounded break minutes, so the next punch of
+    # every day recomputes it in full, which also fills in break_time
+    WorkSession = apps.get_model("timetracking", "WorkSession")
+    WorkSession.objects.filter(last_entry_at__isnull=False).update(last_entry_at=None)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("timetracking", "0006_covering_validator_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="punchcycle",
+            name="break_time",
+            field=models.DurationField(default=datetime.timedelta(0)),
+        ),
+        migrations.RunPython(reset_incremental_state, migrations.RunPython.noop),
+    ]
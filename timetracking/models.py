@@ -1,6 +1,7 @@
 from django.db import models
 from employees.models import Employee
 import uuid
+from datetime import timedelta
 
 class TimeEntry(models.Model):
     """Time entry model for punch in/out and break tracking"""
@@ -24,10 +25,13 @@ class TimeEntry(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        # updated_at trails the range indexes so list validators are
+        # answered by index-only scans
         indexes = [
-            models.Index(fields=['employee', 'timestamp']),
+            models.Index(fields=['employee', 'timestamp', 'id', 'updated_at']),
             models.Index(fields=['type', 'timestamp']),
-            models.Index(fields=['timestamp']),
+            # Keyset pagination order, id breaks timestamp ties
+            models.Index(fields=['timestamp', 'id', 'updated_at']),
         ]
 
     def __str__(self):
@@ -56,15 +60,21 @@ class WorkSession(models.Model):
     is_early_out = models.BooleanField(default=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='complete')
     note = models.TextField(blank=True, null=True)
+    # Timestamp of the latest entry applied to a well-formed day; null means
+    # the next entry triggers a full recompute
+    last_entry_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ['employee', 'date']
         ordering = ['-date', 'employee__name']
+        # updated_at trails the range indexes so list validators are
+        # answered by index-only scans
         indexes = [
-            models.Index(fields=['employee', 'date']),
-            models.Index(fields=['date']),
+            models.Index(fields=['employee', 'date', 'id', 'updated_at']),
+            # Keyset pagination order, id breaks date ties
+            models.Index(fields=['date', 'id', 'updated_at']),
             models.Index(fields=['status']),
         ]
 
@@ -81,6 +91,9 @@ class PunchCycle(models.Model):
     is_late_in = models.BooleanField(default=False)
     is_early_out = models.BooleanField(default=False)
     duration_hours = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    break_minutes = models.DecimalField(max_digits=6, decimal_places=2, default=0)
+    # Unrounded break time, what incremental totals are built from
+    break_time = models.DurationField(default=timedelta(0))
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -98,4 +111,34 @@ class PunchCycle(models.Model):
         if self.punch_out and self.punch_in:
             duration = self.punch_out - self.punch_in
             self.duration_hours = duration.total_seconds() / 3600
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+class WorkStatus(models.Model):
+    """Live punch status of an employee for their latest work date"""
+
+    STATUS_CHOICES = [
+        ('not_started', 'Not Started'),
+        ('working', 'Working'),
+        ('on_break', 'On Break'),
+        ('finished', 'Finished'),
+    ]
+
+    employee = models.OneToOneField(
+        Employee, on_delete=models.CASCADE, primary_key=True, related_name='work_status'
+    )
+    work_date = models.DateField()
+    current_status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='not_started')
+    last_entry = models.ForeignKey(
+        TimeEntry, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    can_punch_in = models.BooleanField(default=True)
+    can_punch_out = models.BooleanField(default=False)
+    can_start_break = models.BooleanField(default=False)
+    can_end_break = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Work Statuses"
+
+    def __str__(self):
+        return f"{self.employee.name} - {self.get_current_status_display()} on {self.work_date}"
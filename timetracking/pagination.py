@@ -0,0 +1,168 @@
+"""Keyset pagination for the append-heavy entry and session lists.
+
+Pages are addressed by the sort key of the row they continue from rather
+than by an offset, so the database seeks straight to the page through the
+ordering index: fetching page 10,000 costs the same as fetching page 1, and
+no COUNT(*) is ever run. Cursors are opaque base64 tokens holding the key
+values of the boundary row and the direction of travel.
+"""
+import base64
+import json
+from datetime import date
+from functools import partial
+from uuid import UUID
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over a unique, multi-column ordering.
+
+    Views declare ``keyset_ordering``, e.g. ``('-timestamp', '-id')``; the
+    last field must be unique so every row has a distinct position.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.page_size = settings.KEYSET_PAGE_SIZE
+        self.max_page_size = settings.KEYSET_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        rows = list(self.get_page_queryset(queryset, request, view))
+        values, reverse = self.cursor
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # A cursor means we arrived from a neighbouring page in the other
+        # direction, so that page exists without having to query for it
+        if reverse:
+            self.has_next, self.has_previous = values is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+        self.first_row = rows[0] if rows else None
+        self.last_row = rows[-1] if rows else None
+        return rows
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """The requested page plus one row, ordered and sliced but unevaluated"""
+        self.request = request
+        self.ordering = tuple(view.keyset_ordering)
+        self.page_size = self.get_page_size(request)
+        self.cursor = values, reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(_flip(field) for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            try:
+                queryset = queryset.filter(self.after(ordering, values))
+            except ValidationError:
+                # Cursor values that do not parse as the key fields
+                raise NotFound(self.invalid_cursor_message)
+
+        # One row past the page tells whether another page follows
+        return queryset[:self.page_size + 1]
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def after(self, ordering, values):
+        """Rows strictly after ``values`` in ``ordering``, as a row comparison.
+
+        The leading column is also bounded on its own so the planner can
+        turn the condition into a single index range scan.
+        """
+        condition = Q()
+        for position, field in enumerate(ordering):
+            name, descending = _field_name(field), field.startswith('-')
+            lookup = {_field_name(f): v for f, v in zip(ordering[:position], values)}
+            lookup[f'{name}__{"lt" if descending else "gt"}'] = values[position]
+            condition |= Q(**lookup)
+        first = ordering[0]
+        leading = Q(**{f'{_field_name(first)}__{"lte" if first.startswith("-") else "gte"}': values[0]})
+        return leading & condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            values, reverse = payload['v'], bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def encode_cursor(self, row, reverse):
+        # Rows are model instances, or dicts for values() querysets
+        get = row.get if isinstance(row, dict) else partial(getattr, row)
+        values = [_key_value(get(_field_name(field))) for field in self.ordering]
+        payload = json.dumps({'v': values, 'r': int(reverse)}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode('ascii')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or self.last_row is None:
+            return None
+        return self.encode_cursor(self.last_row, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_row is None:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.first_row, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+def _key_value(value):
+    # Full precision isoformat, a truncated timestamp would skip or repeat rows
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _field_name(field):
+    return field.lstrip('-')
+
+
+def _flip(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
@@ -14,7 +14,8 @@ class TimeEntrySerializer(serializers.ModelSerializer):
 class PunchCycleSerializer(serializers.ModelSerializer):
     class Meta:
         model = PunchCycle
-        fields = '__all__'
+        # break_time is the unrounded copy of break_minutes kept for the incremental path
+        exclude = ('break_time',)
         read_only_fields = ('id', 'duration_hours', 'created_at', 'updated_at')
 
 class WorkSessionSerializer(serializers.ModelSerializer):
@@ -24,7 +25,8 @@ class WorkSessionSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = WorkSession
-        fields = '__all__'
+        # last_entry_at is the incremental path's bookkeeping, cleared on every write here
+        exclude = ('last_entry_at',)
         read_only_fields = ('id', 'created_at', 'updated_at')
 
 class TimeEntryCreateSerializer(serializers.Serializer):
@@ -41,6 +43,13 @@ class TimeEntryCreateSerializer(serializers.Serializer):
         except Employee.DoesNotExist:
             raise serializers.ValidationError('Employee not found or inactive.')
 
+class BulkTimeEntryItemSerializer(serializers.Serializer):
+    """A buffered punch; employees are checked in one query by the service"""
+    employee_id = serializers.UUIDField()
+    type = serializers.ChoiceField(choices=TimeEntry.TYPE_CHOICES)
+    timestamp = serializers.DateTimeField(required=False)
+    notes = serializers.CharField(required=False, allow_blank=True)
+
 class WorkStatusSerializer(serializers.Serializer):
     can_punch_in = serializers.BooleanField()
     can_punch_out = serializers.BooleanField()
@@ -0,0 +1,50 @@
+"""Background work session recomputes.
+
+With SESSION_RECOMPUTE_ASYNC enabled a punch only inserts its TimeEntry and
+refreshes the live status; the session and its cycles are recomputed by a
+task. Punches for the same employee-day within
+SESSION_RECOMPUTE_COALESCE_SECONDS share one task: the first punch claims a
+cache key and enqueues the task with that countdown, later punches find the
+key taken. The task releases the key before reading entries, so a punch
+landing mid-recompute schedules another run rather than being missed.
+"""
+from datetime import date
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from employees.models import Employee
+from .utils import TimeCalculationService
+
+
+def recompute_key(employee_id, work_date):
+    return f'work_session:recompute:{employee_id}:{work_date.isoformat()}'
+
+
+def schedule_work_session_recompute(employee_id, work_date):
+    """Enqueue a recompute of an employee-day unless one is already pending"""
+    window = settings.SESSION_RECOMPUTE_COALESCE_SECONDS
+    # Keep the key a little longer than the countdown so a busy queue does
+    # not let duplicates through before the task starts
+    if not cache.add(recompute_key(employee_id, work_date), True, window + 60):
+        return False
+    recompute_work_session.apply_async(
+        args=(str(employee_id), work_date.isoformat()),
+        countdown=window
+    )
+    return True
+
+
+@shared_task(ignore_result=True)
+def recompute_work_session(employee_id, work_date):
+    """Recompute the work session of an employee-day from its time entries"""
+    work_date = date.fromisoformat(work_date)
+    cache.delete(recompute_key(employee_id, work_date))
+
+    employee = Employee.objects.filter(pk=employee_id).first()
+    if employee is None:
+        return
+    with transaction.atomic():
+        TimeCalculationService()._update_work_session(employee, work_date)
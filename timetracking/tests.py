@@ -0,0 +1,345 @@
+from datetime import datetime, time, timedelta
+from unittest import mock
+
+from django.contrib import admin
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from employees.models import Employee
+from .admin import TimeEntryAdmin
+from .engine import compute_session
+from .filters import filter_local_dates, filter_local_timestamps
+from .local_calendar import CENTRAL_TZ, local_today
+from .locks import lock_work_day
+from .models import PunchCycle, TimeEntry, WorkSession, WorkStatus
+from .utils import CENTS, TimeCalculationService
+
+
+def create_employee(**fields):
+    """An active employee, Ada Lovelace unless ``fields`` say otherwise"""
+    return Employee.objects.create(**{
+        'name': 'Ada Lovelace', 'employee_id': 'E-1', 'email': 'ada@example.com',
+        'department': 'Engineering', 'position': 'Engineer', **fields
+    })
+
+
+class IncrementalSessionTests(TestCase):
+    """Sessions built one punch at a time match a full recompute"""
+
+    def setUp(self):
+        # A past day, so nothing is counted up to now
+        self.work_date = local_today() - timedelta(days=1)
+        self.service = TimeCalculationService()
+        self.employee = create_employee()
+
+    def punch_day(self, cycles, work, break_=None, start=time(8)):
+        """Punch ``cycles`` cycles of ``work`` with an optional break in each"""
+        moment = CENTRAL_TZ.localize(datetime.combine(self.work_date, start))
+        for _ in range(cycles):
+            entries = [('punch_in', timedelta(0))]
+            if break_ is not None:
+                entries += [('break_start', work / 2), ('break_end', break_)]
+                entries.append(('punch_out', work - work / 2))
+            else:
+                entries.append(('punch_out', work))
+            for entry_type, step in entries:
+                moment += step
+                self.service.create_time_entry(self.employee.pk, entry_type, moment)
+            moment += timedelta(minutes=3)
+
+    def assertMatchesRecompute(self):
+        work_session = WorkSession.objects.get(employee=self.employee, date=self.work_date)
+        # Every punch after the first was applied incrementally
+        self.assertIsNotNone(work_session.last_entry_at)
+        records = self.service._load_entry_records(self.employee, self.work_date)
+        result = compute_session(records, timezone.now(), False)
+        self.assertEqual(work_session.working_hours, result.working_hours.quantize(CENTS))
+        self.assertEqual(work_session.break_duration, result.break_duration.quantize(CENTS))
+        self.assertEqual(work_session.total_hours, result.total_hours.quantize(CENTS))
+        self.assertEqual(work_session.punch_cycles.count(), len(result.cycles))
+
+    def test_odd_minute_cycles(self):
+        self.punch_day(8, timedelta(minutes=7))
+        self.assertMatchesRecompute()
+
+    def test_odd_minute_cycles_with_breaks(self):
+        self.punch_day(8, timedelta(minutes=11), timedelta(minutes=7))
+        self.assertMatchesRecompute()
+
+    def test_odd_second_cycles_with_breaks(self):
+        self.punch_day(12, timedelta(minutes=13, seconds=7), timedelta(minutes=4, seconds=41))
+        self.assertMatchesRecompute()
+
+    def test_punch_after_edit_recomputes_day(self):
+        self.punch_day(2, timedelta(minutes=7))
+        work_session = WorkSession.objects.get(employee=self.employee, date=self.work_date)
+        response = APIClient().put(
+            reverse('worksession-edit', args=[work_session.pk]),
+            {
+                'punch_in': (work_session.punch_in - timedelta(hours=1)).isoformat(),
+                'punch_out': work_session.punch_out.isoformat(),
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        work_session.refresh_from_db()
+        self.assertIsNone(work_session.last_entry_at)
+
+        self.punch_day(1, timedelta(minutes=7), start=time(12))
+        records = self.service._load_entry_records(self.employee, self.work_date)
+        work_session.refresh_from_db()
+        self.assertEqual(work_session.punch_in, records[0].timestamp)
+        self.assertMatchesRecompute()
+
+    def test_punch_after_entry_edit_recomputes_day(self):
+        self.punch_day(2, timedelta(minutes=30))
+        punch_out = TimeEntry.objects.filter(employee=self.employee, type='punch_out').earliest('timestamp')
+        moved_to = punch_out.timestamp - timedelta(minutes=10)
+        response = APIClient().patch(
+            reverse('time-entries-detail', args=[punch_out.pk]), {'timestamp': moved_to.isoformat()}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        work_session = WorkSession.objects.get(employee=self.employee, date=self.work_date)
+        self.assertEqual(work_session.punch_cycles.earliest('punch_in').punch_out, moved_to)
+
+        self.punch_day(1, timedelta(minutes=30), start=time(12))
+        self.assertMatchesRecompute()
+
+    def test_punch_after_entry_delete_and_back_dated_create_recomputes_day(self):
+        self.punch_day(2, timedelta(minutes=30))
+        client = APIClient()
+        last_cycle = TimeEntry.objects.filter(employee=self.employee).order_by('-timestamp')[:2]
+        for entry in list(last_cycle):
+            self.assertEqual(client.delete(reverse('time-entries-detail', args=[entry.pk])).status_code, 204)
+        response = client.post(reverse('time-entries-list'), {
+            'employee': str(self.employee.pk),
+            'type': 'punch_in',
+            'timestamp': CENTRAL_TZ.localize(datetime.combine(self.work_date, time(7))).isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        response = client.post(reverse('time-entries-list'), {
+            'employee': str(self.employee.pk),
+            'type': 'punch_out',
+            'timestamp': CENTRAL_TZ.localize(datetime.combine(self.work_date, time(7, 45))).isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        self.punch_day(1, timedelta(minutes=30), start=time(12))
+        self.assertMatchesRecompute()
+
+    def test_admin_entry_edit_recomputes_day(self):
+        self.punch_day(2, timedelta(minutes=30))
+        entry_admin = TimeEntryAdmin(TimeEntry, admin.site)
+        punch_out = TimeEntry.objects.filter(employee=self.employee, type='punch_out').earliest('timestamp')
+        punch_out.timestamp -= timedelta(minutes=10)
+        entry_admin.save_model(None, punch_out, None, True)
+        last_cycle = TimeEntry.objects.filter(employee=self.employee).order_by('-timestamp')[:2]
+        entry_admin.delete_queryset(None, TimeEntry.objects.filter(pk__in=[entry.pk for entry in last_cycle]))
+
+        work_session = WorkSession.objects.get(employee=self.employee, date=self.work_date)
+        self.assertEqual(work_session.punch_cycles.get().punch_out, punch_out.timestamp)
+        self.punch_day(1, timedelta(minutes=30), start=time(12))
+        self.assertMatchesRecompute()
+
+
+class EntryEditStatusTests(TestCase):
+    """The live status follows entries written through the entries API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.service = TimeCalculationService()
+        self.employee = create_employee()
+        self.punch_in = self.service.create_time_entry(self.employee.pk, 'punch_in')
+
+    def work_status(self):
+        response = self.client.get(reverse('work-status', args=[self.employee.pk]))
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_deleted_only_punch_in(self):
+        self.assertEqual(self.work_status()['current_status'], 'working')
+        response = self.client.delete(reverse('time-entries-detail', args=[self.punch_in.pk]))
+        self.assertEqual(response.status_code, 204)
+
+        work_status = self.work_status()
+        self.assertEqual(work_status['current_status'], 'not_started')
+        self.assertTrue(work_status['can_punch_in'])
+        self.assertIsNone(work_status['last_action'])
+
+    def test_edited_entry(self):
+        punch_out = self.service.create_time_entry(self.employee.pk, 'punch_out')
+        self.assertEqual(self.work_status()['current_status'], 'finished')
+        response = self.client.patch(
+            reverse('time-entries-detail', args=[punch_out.pk]), {'type': 'break_start'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        work_status = self.work_status()
+        self.assertEqual(work_status['current_status'], 'on_break')
+        self.assertTrue(work_status['can_end_break'])
+        self.assertEqual(work_status['last_action']['id'], str(punch_out.pk))
+
+
+class ConditionalListTests(TestCase):
+    """Cached lists are revalidated when the employee data they embed changes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.service = TimeCalculationService()
+        self.employee = create_employee()
+        self.service.create_time_entry(self.employee.pk, 'punch_in')
+
+    def assertRenameRevalidates(self, url):
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.employee.name = 'Ada King'
+        self.employee.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response
+
+    def test_entry_page(self):
+        response = self.assertRenameRevalidates(reverse('time-entries-list'))
+        self.assertEqual(response.data['results'][0]['employee_name'], 'Ada King')
+
+    def test_today_entries(self):
+        response = self.assertRenameRevalidates(reverse('time-entries-today'))
+        self.assertEqual(response.data[0]['employee_name'], 'Ada King')
+
+    def test_session_page(self):
+        response = self.assertRenameRevalidates(reverse('work-sessions-list'))
+        self.assertEqual(response.data['results'][0]['employee_name'], 'Ada King')
+
+    def test_work_status(self):
+        response = self.assertRenameRevalidates(reverse('work-status', args=[self.employee.pk]))
+        self.assertEqual(response.data['last_action']['employee_name'], 'Ada King')
+
+
+class BulkGenerateTests(TestCase):
+    """Bulk recomputes don't clobber punches that race them"""
+
+    def setUp(self):
+        self.work_date = local_today() - timedelta(days=1)
+        self.service = TimeCalculationService()
+        self.employee = create_employee()
+        self.day_start = CENTRAL_TZ.localize(datetime.combine(self.work_date, time(8)))
+        self.service.create_time_entry(self.employee.pk, 'punch_in', self.day_start)
+        self.service.create_time_entry(self.employee.pk, 'punch_out', self.day_start + timedelta(hours=4))
+
+    def test_punch_between_scan_and_write_is_kept(self):
+        punched = []
+
+        def punch_then_lock(employee_id, work_date):
+            # A punch that commits after the entries were scanned but before
+            # the bulk write gets hold of the day
+            if not punched:
+                punched.append(True)
+                self.service.create_time_entry(
+                    self.employee.pk, 'punch_in', self.day_start + timedelta(hours=5)
+                )
+            lock_work_day(employee_id, work_date)
+
+        with mock.patch('timetracking.utils.lock_work_day', side_effect=punch_then_lock):
+            self.service.bulk_generate_work_sessions(self.work_date.isoformat(), self.work_date.isoformat())
+
+        work_session = WorkSession.objects.get(employee=self.employee, date=self.work_date)
+        self.assertEqual(work_session.status, 'in_progress')
+        self.assertEqual(PunchCycle.objects.filter(work_session=work_session).count(), 2)
+        records = self.service._load_entry_records(self.employee, self.work_date)
+        self.assertEqual(work_session.last_entry_at, records[-1].timestamp)
+
+
+@override_settings(SESSION_RECOMPUTE_ASYNC=True)
+class AsyncPunchTests(TestCase):
+    """Punches that leave the session to a background recompute"""
+
+    def setUp(self):
+        self.work_date = local_today() - timedelta(days=1)
+        self.service = TimeCalculationService()
+        self.employee = create_employee()
+
+    def test_back_dated_punch_keeps_latest_entry(self):
+        day_start = CENTRAL_TZ.localize(datetime.combine(self.work_date, time(8)))
+        self.service.create_time_entry(self.employee.pk, 'punch_in', day_start)
+        punch_out = self.service.create_time_entry(self.employee.pk, 'punch_out', day_start + timedelta(hours=4))
+        self.service.create_time_entry(self.employee.pk, 'break_start', day_start + timedelta(hours=2))
+
+        work_status = WorkStatus.objects.get(employee=self.employee)
+        self.assertEqual(work_status.last_entry_id, punch_out.pk)
+
+
+class ListFilterPlanTests(TestCase):
+    """List date filters are index range scans on a realistically sized table"""
+
+    employees = 40
+    days = 120
+
+    @classmethod
+    def setUpTestData(cls):
+        first_date = local_today() - timedelta(days=cls.days)
+        entries, sessions = [], []
+        for number in range(cls.employees):
+            employee = create_employee(
+                name=f'Employee {number}', employee_id=f'E-{number}', email=f'e{number}@example.com'
+            )
+            for day in range(cls.days):
+                work_date = first_date + timedelta(days=day)
+                day_start = CENTRAL_TZ.localize(datetime.combine(work_date, time(8)))
+                for entry_type, hours in (('punch_in', 0), ('break_start', 4), ('break_end', 4.5), ('punch_out', 8.5)):
+                    entries.append(TimeEntry(
+                        employee=employee, type=entry_type, timestamp=day_start + timedelta(hours=hours)
+                    ))
+                sessions.append(WorkSession(employee=employee, date=work_date))
+        TimeEntry.objects.bulk_create(entries, batch_size=5000)
+        WorkSession.objects.bulk_create(sessions, batch_size=5000)
+        cls.employee = employee
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        self.end_date = local_today()
+        self.start_date = self.end_date - timedelta(days=6)
+
+    def explain(self, queryset):
+        # A list page, as the keyset paginator fetches it
+        return queryset[:51].explain()
+
+    def is_index_range_scan(self, plan, column):
+        lines = plan.splitlines()
+        if connection.vendor == 'postgresql':
+            # Index Cond: ((timetracking_timeentry."timestamp" >= ...) AND ...)
+            return any('Index Cond' in line and f'{column} >' in line.replace('"', '') for line in lines)
+        # SEARCH timetracking_timeentry USING INDEX ... (timestamp>? AND timestamp<?)
+        return any('SEARCH' in line and f'{column}>?' in line for line in lines)
+
+    def assertIndexRangeScan(self, queryset, column):
+        plan = self.explain(queryset)
+        self.assertTrue(self.is_index_range_scan(plan, column), plan)
+
+    def test_entry_local_timestamp_range(self):
+        entries = TimeEntry.objects.order_by('-timestamp', '-id')
+        self.assertIndexRangeScan(filter_local_timestamps(entries, self.start_date, self.end_date), 'timestamp')
+        self.assertIndexRangeScan(
+            filter_local_timestamps(entries.filter(employee=self.employee), self.start_date, self.end_date),
+            'timestamp'
+        )
+
+    def test_entry_date_cast_is_not_a_range_scan(self):
+        entries = TimeEntry.objects.order_by('-timestamp', '-id').filter(
+            timestamp__date__gte=self.start_date, timestamp__date__lte=self.end_date
+        )
+        self.assertFalse(self.is_index_range_scan(self.explain(entries), 'timestamp'))
+
+    def test_session_local_date_range(self):
+        sessions = WorkSession.objects.order_by('-date', '-id')
+        self.assertIndexRangeScan(filter_local_dates(sessions, self.start_date, self.end_date), 'date')
+        self.assertIndexRangeScan(
+            filter_local_dates(sessions.filter(employee=self.employee), self.start_date, self.end_date),
+            'date'
+        )
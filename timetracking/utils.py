@@ -1,18 +1,40 @@
+from django.conf import settings
+from django.db import models, transaction
 from django.utils import timezone
-import pytz
-from datetime import datetime, date, time, timedelta
+from collections import defaultdict
+from datetime import datetime, date, timedelta
 from decimal import Decimal
-from .models import TimeEntry, WorkSession, PunchCycle
-from employees.models import Employee, BusinessHours
+from time import perf_counter
+from .models import TimeEntry, WorkSession, PunchCycle, WorkStatus
+from .locks import lock_work_day
+from .local_calendar import (
+    to_local_chicago, local_date, local_day_bounds, local_range_bounds
+)
+from .engine import (
+    EntryRecord, ENTRY_RECORD_FIELDS, TRANSITIONS, compute_session,
+    add_ongoing, hours_between, minutes_of, derive_work_status,
+    work_status_from_counts
+)
+from employees.business_hours import get_business_schedule
+from reports.rollups import sync_daily_rollups
+from employees.models import Employee
 
-CENTRAL_TZ = pytz.timezone('America/Chicago')
+CENTS = Decimal('0.01')
 
-def to_local_chicago(dt):
-    """Convert UTC datetime to Chicago local time (TEST: returns hardcoded time)"""
-    if dt.tzinfo is None:
-        dt = timezone.make_aware(dt, timezone.utc)
-    return dt.astimezone(CENTRAL_TZ)
+# PunchCycle fields written from a computed CycleResult
+PUNCH_CYCLE_FIELDS = ['punch_out', 'is_late_in', 'is_early_out', 'duration_hours', 'break_minutes', 'break_time']
 
+# WorkSession fields written from a computed SessionResult
+BULK_SESSION_FIELDS = [
+    'punch_in', 'punch_out', 'break_start', 'break_end', 'is_late_in', 'is_early_out',
+    'total_hours', 'working_hours', 'break_duration', 'status', 'last_entry_at',
+]
+
+# WorkStatus fields refreshed when a day is recomputed
+WORK_STATUS_FIELDS = [
+    'work_date', 'last_entry', 'current_status', 'can_punch_in', 'can_punch_out',
+    'can_start_break', 'can_end_break', 'updated_at',
+]
 
 class TimeCalculationService:
     """Service class for time tracking calculations"""
@@ -24,43 +46,139 @@ class TimeCalculationService:
         # Always use local Chicago time for calculations
         local_timestamp = to_local_chicago(timestamp)
         employee = Employee.objects.get(id=employee_id, is_active=True)
-        business_hours = BusinessHours.get_current()
+        schedule = get_business_schedule()
 
         # Calculate late/early flags
-        is_late = self._is_late_entry(local_timestamp, business_hours, entry_type)
-        is_early = self._is_early_entry(local_timestamp, business_hours, entry_type)
-        # Create time entry
-        time_entry = TimeEntry.objects.create(
-            employee=employee,
-            type=entry_type,
-            timestamp=timestamp,
-            is_late=is_late,
-            is_early=is_early,
-            notes=notes
-        )
+        is_late = schedule.is_late(local_timestamp, entry_type)
+        is_early = schedule.is_early(local_timestamp, entry_type)
+
+        # The entry, its session and the live status are committed together,
+        # serialized with other writers of the same employee-day
+        work_date = local_timestamp.date()
+        with transaction.atomic():
+            lock_work_day(employee.pk, work_date)
+            time_entry = TimeEntry.objects.create(
+                employee=employee,
+                type=entry_type,
+                timestamp=timestamp,
+                is_late=is_late,
+                is_early=is_early,
+                notes=notes
+            )
+
+            if settings.SESSION_RECOMPUTE_ASYNC:
+                # Only the live status is kept current here, the session is
+                # recomputed by a coalesced task once the entry is committed.
+                # The new entry isn't the day's latest if it was back-dated,
+                # so the latest one is looked up.
+                self._refresh_work_status(employee.pk, work_date)
+                self._schedule_work_session_recompute(employee.pk, work_date)
+                return time_entry
 
-        # Update or create work session
-        self._update_work_session(employee, local_timestamp.date())
+            # Update or create work session, applying just this entry when the
+            # day is well-formed and the entry is the latest one
+            work_session = self._apply_entry_incrementally(employee, work_date, time_entry)
+            if work_session is not None:
+                sync_daily_rollups([(work_session, None)])
+                self._sync_work_status(
+                    employee.pk,
+                    work_date,
+                    derive_work_status(
+                        work_session.status != 'complete',
+                        work_session.status == 'on_break',
+                        work_session.punch_out is not None
+                    ),
+                    time_entry.pk
+                )
+            else:
+                self._update_work_session(employee, work_date)
 
         return time_entry
 
+    def create_time_entries_bulk(self, items):
+        """Create many time entries at once and recompute each affected session once.
+
+        ``items`` are validated punch dicts. Returns one result per item, in
+        order, with the created entry or an error.
+        """
+        schedule = get_business_schedule()
+        employees = Employee.objects.filter(is_active=True).in_bulk(
+            {item['employee_id'] for item in items}
+        )
+
+        results, entries, affected_days = [], [], {}
+        for index, item in enumerate(items):
+            employee = employees.get(item['employee_id'])
+            if employee is None:
+                results.append({
+                    'index': index,
+                    'success': False,
+                    'errors': {'employee_id': ['Employee not found or inactive.']}
+                })
+                continue
+
+            timestamp = item.get('timestamp') or timezone.now()
+            local_timestamp = to_local_chicago(timestamp)
+            time_entry = TimeEntry(
+                employee=employee,
+                type=item['type'],
+                timestamp=timestamp,
+                is_late=schedule.is_late(local_timestamp, item['type']),
+                is_early=schedule.is_early(local_timestamp, item['type']),
+                notes=item.get('notes', '')
+            )
+            entries.append(time_entry)
+            affected_days[(employee.pk, local_timestamp.date())] = employee
+            results.append({'index': index, 'success': True, 'entry': time_entry})
+
+        with transaction.atomic():
+            # Lock every affected employee-day up front, in a fixed order so
+            # overlapping batches cannot deadlock
+            for employee_id, work_date in sorted(affected_days, key=lambda day: (str(day[0]), day[1])):
+                lock_work_day(employee_id, work_date)
+            TimeEntry.objects.bulk_create(entries)
+            for (employee_id, work_date), employee in affected_days.items():
+                if settings.SESSION_RECOMPUTE_ASYNC:
+                    self._refresh_work_status(employee_id, work_date)
+                    self._schedule_work_session_recompute(employee_id, work_date)
+                else:
+                    self._update_work_session(employee, work_date)
+
+        return results
+
+    def edit_time_entries(self, days, write):
+        """Run ``write``, a direct change to time entries, and recompute the affected days.
+
+        ``days`` holds the (employee, local date) of every entry ``write``
+        adds, changes (both its old and new day) or deletes. The days are
+        locked before the write so punches can't interleave, and their
+        sessions and the live status are rebuilt from the entries afterwards,
+        since the stored cycles and totals no longer follow from them.
+        Returns what ``write`` returns.
+        """
+        days = {(employee.pk, work_date): employee for employee, work_date in days}
+        with transaction.atomic():
+            for employee_id, work_date in sorted(days, key=lambda day: (str(day[0]), day[1])):
+                lock_work_day(employee_id, work_date)
+            result = write()
+            for (employee_id, work_date), employee in days.items():
+                WorkSession.objects.filter(
+                    employee_id=employee_id, date=work_date
+                ).update(last_entry_at=None)
+                if self._update_work_session(employee, work_date) is None:
+                    # No entries left that day, the live status still has to drop them
+                    self._refresh_work_status(employee_id, work_date)
+        return result
+
     def get_current_work_status(self, employee_id):
         """Get current work status for an employee"""
-        employee = Employee.objects.get(id=employee_id, is_active=True)
-        today = to_local_chicago(timezone.now()).date()
-        start_local = CENTRAL_TZ.localize(datetime.combine(today, time.min))
-        end_local = CENTRAL_TZ.localize(datetime.combine(today, time.max))
-
-        start_utc = start_local.astimezone(pytz.UTC)
-        end_utc = end_local.astimezone(pytz.UTC)
+        today = local_date(timezone.now())
+        employee = Employee.objects.select_related(
+            'work_status__last_entry__employee'
+        ).get(id=employee_id, is_active=True)
+        work_status = getattr(employee, 'work_status', None)
 
-        # Get today's entries
-        today_entries = TimeEntry.objects.filter(
-            employee=employee,
-            timestamp__range=(start_utc, end_utc)
-        ).order_by('timestamp')
-        
-        if not today_entries.exists():
+        if work_status is None or work_status.work_date != today:
             return {
                 'can_punch_in': True,
                 'can_punch_out': False,
@@ -69,47 +187,38 @@ class TimeCalculationService:
                 'current_status': 'not_started',
                 'last_action': None
             }
-        
-        # Analyze entries to determine current status
-        punch_ins = today_entries.filter(type='punch_in').count()
-        punch_outs = today_entries.filter(type='punch_out').count()
-        break_starts = today_entries.filter(type='break_start').count()
-        break_ends = today_entries.filter(type='break_end').count()
-        
-        last_entry = today_entries.last()
-        
-        # Determine current status
-        is_punched_in = punch_ins > punch_outs
-        is_on_break = break_starts > break_ends
-        
-        if not is_punched_in:
-            current_status = 'finished' if punch_outs > 0 else 'not_started'
-            return {
-                'can_punch_in': True,
-                'can_punch_out': False,
-                'can_start_break': False,
-                'can_end_break': False,
-                'current_status': current_status,
-                'last_action': last_entry
-            }
-        elif is_on_break:
-            return {
-                'can_punch_in': False,
-                'can_punch_out': False,
-                'can_start_break': False,
-                'can_end_break': True,
-                'current_status': 'on_break',
-                'last_action': last_entry
-            }
-        else:
-            return {
-                'can_punch_in': False,
-                'can_punch_out': True,
-                'can_start_break': True,
-                'can_end_break': False,
-                'current_status': 'working',
-                'last_action': last_entry
-            }
+
+        return {
+            'can_punch_in': work_status.can_punch_in,
+            'can_punch_out': work_status.can_punch_out,
+            'can_start_break': work_status.can_start_break,
+            'can_end_break': work_status.can_end_break,
+            'current_status': work_status.current_status,
+            'last_action': work_status.last_entry
+        }
+
+    def rebuild_work_statuses(self, batch_size=None):
+        """Rebuild every employee's live status from the time entry log"""
+        batch_size = batch_size or settings.SESSION_RECOMPUTE_BATCH_SIZE
+        latest_entries = TimeEntry.objects.values('employee_id').annotate(
+            latest=models.Max('timestamp')
+        ).order_by()
+
+        statuses = []
+        for row in latest_entries.iterator(chunk_size=batch_size):
+            work_date = local_date(row['latest'])
+            records = self._load_entry_records(row['employee_id'], work_date)
+            statuses.append(WorkStatus(
+                employee_id=row['employee_id'],
+                work_date=work_date,
+                last_entry_id=records[-1].id,
+                **work_status_from_counts(compute_session(records, timezone.now(), False).counts)
+            ))
+
+        with transaction.atomic():
+            WorkStatus.objects.all().delete()
+            WorkStatus.objects.bulk_create(statuses, batch_size=batch_size)
+        return len(statuses)
 
     def generate_work_sessions(self, start_date, end_date):
         """Generate work sessions for a date range"""
@@ -119,8 +228,10 @@ class TimeCalculationService:
         sessions = []
         current_date = start_date
         while current_date <= end_date:
+            start_utc, end_utc = local_day_bounds(current_date)
             employees_with_entries = Employee.objects.filter(
-                time_entries__timestamp__date=current_date
+                time_entries__timestamp__gte=start_utc,
+                time_entries__timestamp__lt=end_utc
             ).distinct()
             for employee in employees_with_entries:
                 session = self._update_work_session(employee, current_date)
@@ -129,183 +240,405 @@ class TimeCalculationService:
             current_date += timedelta(days=1)
         return sessions
 
+    def bulk_generate_work_sessions(self, start_date, end_date, batch_size=None):
+        """Recompute all work sessions for a date range in bulk.
+
+        Entries are streamed in one ordered scan, grouped by employee and
+        local date, computed in memory and written back in batches.
+        """
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+        batch_size = batch_size or settings.SESSION_RECOMPUTE_BATCH_SIZE
+        timings = {}
+
+        start_utc, end_utc = local_range_bounds(start_date, end_date)
+
+        # Phase 1: stream entries and compute one session per employee-day
+        started = perf_counter()
+        now = timezone.now()
+        today = local_date(now)
+        results, fingerprints = {}, defaultdict(set)
+        rows = TimeEntry.objects.filter(
+            timestamp__gte=start_utc,
+            timestamp__lt=end_utc
+        ).order_by('employee_id', 'timestamp').values_list(
+            'employee_id', 'updated_at', *ENTRY_RECORD_FIELDS
+        ).iterator(chunk_size=batch_size)
+
+        current_key, records = None, []
+        for row in rows:
+            record = EntryRecord._make(row[2:])
+            key = (row[0], local_date(record.timestamp))
+            if key != current_key:
+                if records:
+                    results[current_key] = compute_session(records, now, current_key[1] == today)
+                current_key, records = key, []
+            records.append(record)
+            fingerprints[key].add((record.id, row[1]))
+        if records:
+            results[current_key] = compute_session(records, now, current_key[1] == today)
+        timings['compute_ms'] = round((perf_counter() - started) * 1000, 2)
+
+        # Phase 2: write sessions and their cycles in batches of employee-days.
+        # Each batch first locks its days, in the same order as other writers,
+        # then recomputes the days whose entries changed since the scan and
+        # matches them to their current rows, so a punch that raced the scan
+        # is neither overwritten nor has its cycle deleted as an orphan.
+        match_seconds = write_seconds = 0
+        created = updated = 0
+        days = sorted(results, key=lambda day: (str(day[0]), day[1]))
+        for i in range(0, len(days), batch_size):
+            batch = days[i:i + batch_size]
+            with transaction.atomic():
+                started = perf_counter()
+                for employee_id, work_date in batch:
+                    lock_work_day(employee_id, work_date)
+                for employee_id, work_date in self._changed_days(batch, fingerprints):
+                    records = self._load_entry_records(employee_id, work_date)
+                    if records:
+                        results[(employee_id, work_date)] = compute_session(records, now, work_date == today)
+                    else:
+                        del results[(employee_id, work_date)]
+                batch = [day for day in batch if day in results]
+
+                existing = {}
+                if batch:
+                    batch_dates = [work_date for _, work_date in batch]
+                    existing = {
+                        (session.employee_id, session.date): session
+                        for session in WorkSession.objects.filter(
+                            employee_id__in={employee_id for employee_id, _ in batch},
+                            date__range=(min(batch_dates), max(batch_dates))
+                        ).only('id', 'employee_id', 'date')
+                    }
+                to_create, to_update = [], []
+                for employee_id, work_date in batch:
+                    work_session = existing.get((employee_id, work_date))
+                    if work_session is None:
+                        work_session = WorkSession(employee_id=employee_id, date=work_date)
+                        to_create.append(work_session)
+                    else:
+                        work_session.updated_at = now
+                        to_update.append(work_session)
+                    self._apply_session_result(work_session, results[(employee_id, work_date)])
+                match_seconds += perf_counter() - started
+
+                started = perf_counter()
+                WorkSession.objects.bulk_create(to_create, batch_size=batch_size)
+                WorkSession.objects.bulk_update(
+                    to_update, BULK_SESSION_FIELDS + ['updated_at'], batch_size=batch_size
+                )
+                PunchCycle.objects.bulk_create([
+                    self._build_punch_cycle(work_session, cycle)
+                    for work_session in to_create
+                    for cycle in results[(work_session.employee_id, work_session.date)].cycles
+                ], batch_size=batch_size)
+                self._sync_punch_cycles([
+                    (work_session, results[(work_session.employee_id, work_session.date)].cycles)
+                    for work_session in to_update
+                ], batch_size=batch_size)
+                sync_daily_rollups([
+                    (work_session, len(results[(work_session.employee_id, work_session.date)].cycles))
+                    for work_session in to_create + to_update
+                ], batch_size=batch_size)
+                # Live statuses track the current day only
+                WorkStatus.objects.bulk_create([
+                    WorkStatus(
+                        employee_id=employee_id,
+                        work_date=work_date,
+                        last_entry_id=results[(employee_id, work_date)].last_entry.id,
+                        **work_status_from_counts(results[(employee_id, work_date)].counts)
+                    )
+                    for employee_id, work_date in batch
+                    if work_date == today
+                ], batch_size=batch_size, update_conflicts=True, unique_fields=['employee'],
+                    update_fields=WORK_STATUS_FIELDS)
+                write_seconds += perf_counter() - started
+            created += len(to_create)
+            updated += len(to_update)
+        timings['match_ms'] = round(match_seconds * 1000, 2)
+        timings['write_ms'] = round(write_seconds * 1000, 2)
+
+        return {
+            'sessions_count': len(results),
+            'created': created,
+            'updated': updated,
+            'timings': timings,
+        }
+
+    def _changed_days(self, days, fingerprints):
+        """Employee-days whose entries differ from their ``fingerprints``.
+
+        A fingerprint is the set of (id, updated_at) of a day's entries when
+        it was computed; entries added, edited or deleted since change it.
+        """
+        dates = defaultdict(list)
+        for employee_id, work_date in days:
+            dates[employee_id].append(work_date)
+        condition = models.Q()
+        for employee_id, work_dates in dates.items():
+            start_utc, end_utc = local_range_bounds(min(work_dates), max(work_dates))
+            condition |= models.Q(employee_id=employee_id, timestamp__gte=start_utc, timestamp__lt=end_utc)
+
+        current = defaultdict(set)
+        for employee_id, entry_id, timestamp, updated_at in TimeEntry.objects.filter(
+            condition
+        ).order_by().values_list('employee_id', 'id', 'timestamp', 'updated_at'):
+            current[(employee_id, local_date(timestamp))].add((entry_id, updated_at))
+        return [day for day in days if current[day] != fingerprints[day]]
+
     def _update_work_session(self, employee, work_date):
         """Update or create work session for an employee and date"""
-        # Get all time entries for this employee and date
-        start_local = CENTRAL_TZ.localize(datetime.combine(work_date, time.min))
-        end_local = CENTRAL_TZ.localize(datetime.combine(work_date, time.max))
+        with transaction.atomic():
+            lock_work_day(employee.pk, work_date)
+            records = self._load_entry_records(employee, work_date)
+            if not records:
+                return None
 
-        start_utc = start_local.astimezone(pytz.UTC)
-        end_utc = end_local.astimezone(pytz.UTC)
+            # Get or create work session
+            work_session, created = WorkSession.objects.get_or_create(
+                employee=employee,
+                date=work_date,
+                defaults={
+                    'status': 'complete'
+                }
+            )
 
-        entries = TimeEntry.objects.filter(
-            employee=employee,
-            timestamp__range=(start_utc, end_utc)
-        ).order_by('timestamp')
-        
-        if not entries.exists():
-            return None
-        
-        # Get or create work session
-        work_session, created = WorkSession.objects.get_or_create(
+            now = timezone.now()
+            result = compute_session(records, now, local_date(now) == work_date)
+            self._apply_session_result(work_session, result)
+            self._sync_punch_cycles([(work_session, result.cycles)])
+
+            work_session.save()
+            sync_daily_rollups([(work_session, len(result.cycles))])
+            self._sync_work_status(
+                employee.pk, work_date, work_status_from_counts(result.counts), result.last_entry.id
+            )
+        return work_session
+
+    def _sync_work_status(self, employee_id, work_date, flags, last_entry_id):
+        """Update an employee's live status unless it already tracks a later day.
+
+        The row is shared by all of the employee's days, which are locked
+        separately, so it is locked itself before its day is compared.
+        """
+        fields = {'work_date': work_date, 'last_entry_id': last_entry_id, **flags}
+        work_status, created = WorkStatus.objects.select_for_update().get_or_create(
+            employee_id=employee_id, defaults=fields
+        )
+        if created or work_status.work_date > work_date:
+            return work_status
+
+        for name, value in fields.items():
+            setattr(work_status, name, value)
+        work_status.save()
+        return work_status
+
+    def _refresh_work_status(self, employee_id, work_date):
+        """Update an employee's live status from the day's entry counts and latest entry"""
+        start_utc, end_utc = local_day_bounds(work_date)
+        counts = TimeEntry.objects.filter(
+            employee_id=employee_id,
+            timestamp__gte=start_utc,
+            timestamp__lt=end_utc
+        ).aggregate(**{
+            entry_type: models.Count('id', filter=models.Q(type=entry_type))
+            for entry_type, _ in TimeEntry.TYPE_CHOICES
+        })
+        last_entry_id = TimeEntry.objects.filter(
+            employee_id=employee_id,
+            timestamp__gte=start_utc,
+            timestamp__lt=end_utc
+        ).order_by('-timestamp').values_list('id', flat=True).first()
+        return self._sync_work_status(
+            employee_id, work_date, work_status_from_counts(counts), last_entry_id
+        )
+
+    def _schedule_work_session_recompute(self, employee_id, work_date):
+        """Recompute an employee-day in the background after the commit"""
+        from .tasks import schedule_work_session_recompute
+
+        transaction.on_commit(
+            lambda: schedule_work_session_recompute(employee_id, work_date)
+        )
+
+    def _load_entry_records(self, employee, work_date):
+        """Fetch an employee-day's time entries once, as sorted EntryRecords"""
+        start_utc, end_utc = local_day_bounds(work_date)
+
+        rows = TimeEntry.objects.filter(
             employee=employee,
-            date=work_date,
-            defaults={
-                'status': 'complete'
-            }
+            timestamp__gte=start_utc,
+            timestamp__lt=end_utc
+        ).order_by('timestamp').values_list(*ENTRY_RECORD_FIELDS)
+        return [EntryRecord._make(row) for row in rows]
+
+    def _apply_session_result(self, work_session, result):
+        """Copy computed session values onto a WorkSession instance"""
+        work_session.punch_in = result.punch_in
+        work_session.punch_out = result.punch_out
+        work_session.break_start = result.break_start
+        work_session.break_end = result.break_end
+        work_session.is_late_in = result.is_late_in
+        work_session.is_early_out = result.is_early_out
+        work_session.total_hours = result.total_hours
+        work_session.working_hours = result.working_hours
+        work_session.break_duration = result.break_duration
+        work_session.status = result.status
+        work_session.last_entry_at = result.last_entry.timestamp if result.is_sequential else None
+
+    def _sync_punch_cycles(self, pairs, batch_size=None):
+        """Reconcile stored punch cycles with computed ones.
+
+        ``pairs`` holds (work_session, computed cycles) tuples. Cycles are
+        matched to stored rows on punch_in: matched rows keep their id and are
+        only written when a value changed, new cycles are inserted and
+        orphaned rows deleted, each in a single statement.
+        """
+        existing = defaultdict(list)
+        for stored in PunchCycle.objects.filter(
+            work_session__in=[work_session for work_session, _ in pairs]
+        ).order_by('punch_in'):
+            existing[(stored.work_session_id, stored.punch_in)].append(stored)
+
+        now = timezone.now()
+        to_create, to_update = [], []
+        for work_session, cycles in pairs:
+            for cycle in cycles:
+                matches = existing.get((work_session.pk, cycle.punch_in))
+                if not matches:
+                    to_create.append(self._build_punch_cycle(work_session, cycle))
+                    continue
+                stored = matches.pop(0)
+                values = self._punch_cycle_values(cycle)
+                if any(getattr(stored, name) != value for name, value in values.items()):
+                    for name, value in values.items():
+                        setattr(stored, name, value)
+                    stored.updated_at = now
+                    to_update.append(stored)
+
+        orphan_ids = [stored.pk for matches in existing.values() for stored in matches]
+        if orphan_ids:
+            PunchCycle.objects.filter(pk__in=orphan_ids).delete()
+        if to_update:
+            PunchCycle.objects.bulk_update(
+                to_update, PUNCH_CYCLE_FIELDS + ['updated_at'], batch_size=batch_size
+            )
+        if to_create:
+            PunchCycle.objects.bulk_create(to_create, batch_size=batch_size)
+
+    def _punch_cycle_values(self, cycle):
+        """Stored field values of a computed cycle, rounded like the database"""
+        return {
+            'punch_out': cycle.punch_out,
+            'is_late_in': cycle.is_late_in,
+            'is_early_out': cycle.is_early_out,
+            'duration_hours': cycle.duration_hours.quantize(CENTS),
+            'break_minutes': cycle.break_minutes.quantize(CENTS),
+            'break_time': cycle.break_time,
+        }
+
+    def _build_punch_cycle(self, work_session, cycle):
+        """Build an unsaved PunchCycle from a computed cycle"""
+        return PunchCycle(
+            work_session=work_session,
+            punch_in=cycle.punch_in,
+            **self._punch_cycle_values(cycle)
         )
-        
-        # Calculate session data
-        punch_ins = entries.filter(type='punch_in').order_by('timestamp')
-        punch_outs = entries.filter(type='punch_out').order_by('timestamp')
-        break_starts = entries.filter(type='break_start').order_by('timestamp')
-        break_ends = entries.filter(type='break_end').order_by('timestamp')
-        
-        if punch_ins.exists():
-            work_session.punch_in = to_local_chicago(punch_ins.first().timestamp)
-            work_session.is_late_in = punch_ins.first().is_late
-        if punch_outs.exists():
-            work_session.punch_out = to_local_chicago(punch_outs.last().timestamp)
-            work_session.is_early_out = punch_outs.last().is_early
-        
-        if break_starts.exists():
-            work_session.break_start = to_local_chicago(break_starts.first().timestamp)
 
-        if break_ends.exists():
-            work_session.break_end = to_local_chicago(break_ends.last().timestamp)
-        
-        # Calculate hours and status
-        self._calculate_session_hours(work_session, entries)
-        self._update_session_status(work_session, entries)
-        self._create_punch_cycles(work_session, punch_ins, punch_outs)
-        
-        work_session.save()
-        return work_session
+    def _apply_entry_incrementally(self, employee, work_date, time_entry):
+        """Apply a single new entry to the existing session and its open cycle.
 
-    def _calculate_session_hours(self, work_session, entries):
-        """Calculate working hours and break duration for a session"""
-        punch_ins = entries.filter(type='punch_in').order_by('timestamp')
-        punch_outs = entries.filter(type='punch_out').order_by('timestamp')
-        break_starts = entries.filter(type='break_start').order_by('timestamp')
-        break_ends = entries.filter(type='break_end').order_by('timestamp')
-        
-        total_working_hours = Decimal('0')
-        total_break_minutes = Decimal('0')
-        
-        # Calculate working time from punch cycles
-        for i, punch_in in enumerate(punch_ins):
-            if i < len(punch_outs):
-                punch_out = punch_outs[i]
-                # Convert timestamps to local time
-                punch_in_local = to_local_chicago(punch_in.timestamp)
-                punch_out_local = to_local_chicago(punch_out.timestamp)
-                cycle_duration = punch_out_local - punch_in_local
-                cycle_hours = Decimal(str(cycle_duration.total_seconds() / 3600))
-
-                # Calculate break time within this cycle
-                cycle_break_minutes = Decimal('0')
-                for j, break_start in enumerate(break_starts):
-                    break_start_local = to_local_chicago(break_start.timestamp)
-                    if (break_start_local >= punch_in_local and 
-                        break_start_local <= punch_out_local):
-                        if j < len(break_ends):
-                            break_end = break_ends[j]
-                            break_end_local = to_local_chicago(break_end.timestamp)
-                            if break_end_local <= punch_out_local:
-                                break_duration = break_end_local - break_start_local
-                                cycle_break_minutes += Decimal(str(break_duration.total_seconds() / 60))
-
-                total_break_minutes += cycle_break_minutes
-                total_working_hours += max(Decimal('0'), cycle_hours - (cycle_break_minutes / 60))
-        
-        # Handle ongoing work (punched in but not out)
-        if len(punch_ins) > len(punch_outs):
-            last_punch_in = punch_ins.last()
-            last_punch_in_local = to_local_chicago(last_punch_in.timestamp)
-            current_time = to_local_chicago(timezone.now())
-            if current_time.date() == work_session.date:
-                ongoing_duration = current_time - last_punch_in_local
-                ongoing_hours = Decimal(str(ongoing_duration.total_seconds() / 3600))
-                # Check for ongoing break
-                ongoing_break_minutes = Decimal('0')
-                if (break_starts.exists() and 
-                    len(break_starts) > len(break_ends) and
-                    to_local_chicago(break_starts.last().timestamp) >= last_punch_in_local):
-                    break_duration = current_time - to_local_chicago(break_starts.last().timestamp)
-                    ongoing_break_minutes = Decimal(str(break_duration.total_seconds() / 60))
-                total_break_minutes += ongoing_break_minutes
-                total_working_hours += max(Decimal('0'), ongoing_hours - (ongoing_break_minutes / 60))
-        
-        # Calculate total hours (first punch in to last punch out or current time)
-        if work_session.punch_in:
-            if work_session.punch_out:
-                total_duration = work_session.punch_out - work_session.punch_in
-            elif len(punch_ins) > len(punch_outs):
-                total_duration = to_local_chicago(timezone.now()) - work_session.punch_in
-            else:
-                total_duration = timedelta(0)
-            work_session.total_hours = Decimal(str(total_duration.total_seconds() / 3600))
-        else:
-            work_session.total_hours = Decimal('0')
-        work_session.working_hours = total_working_hours
-        work_session.break_duration = total_break_minutes
-
-    def _update_session_status(self, work_session, entries):
-        """Update session status based on current state"""
-        punch_ins = entries.filter(type='punch_in').count()
-        punch_outs = entries.filter(type='punch_out').count()
-        break_starts = entries.filter(type='break_start').count()
-        break_ends = entries.filter(type='break_end').count()
-        
-        is_punched_in = punch_ins > punch_outs
-        is_on_break = break_starts > break_ends
-        
-        if not is_punched_in:
-            work_session.status = 'complete'
-        elif is_on_break:
-            work_session.status = 'on_break'
-        else:
-            work_session.status = 'in_progress'
+        Returns the updated session, or None when the day has to be fully
+        recomputed: no session yet, a malformed day, an out-of-order
+        (back-dated) entry or a transition the day can't make.
+        """
+        work_session = WorkSession.objects.filter(employee=employee, date=work_date).first()
+        if (
+            work_session is None
+            or work_session.last_entry_at is None
+            or time_entry.timestamp <= work_session.last_entry_at
+        ):
+            return None
 
-    def _create_punch_cycles(self, work_session, punch_ins, punch_outs):
-        """Create punch cycles for the work session"""
-        # Clear existing cycles
-        work_session.punch_cycles.all().delete()
-        
-        for i, punch_in in enumerate(punch_ins):
-            punch_out = punch_outs[i] if i < len(punch_outs) else None
-            
-            cycle = PunchCycle.objects.create(
+        new_status = TRANSITIONS.get((work_session.status, time_entry.type))
+        if new_status is None:
+            return None
+
+        timestamp = time_entry.timestamp
+        cycles = work_session.punch_cycles
+        if work_session.status == 'complete':
+            open_cycle = PunchCycle(
                 work_session=work_session,
-                punch_in=punch_in.timestamp,
-                punch_out=punch_out.timestamp if punch_out else None,
-                is_late_in=punch_in.is_late,
-                is_early_out=punch_out.is_early if punch_out else False
+                punch_in=timestamp,
+                is_late_in=time_entry.is_late
             )
+            if work_session.punch_in is None:
+                work_session.punch_in = timestamp
+                work_session.is_late_in = time_entry.is_late
+        else:
+            open_cycle = cycles.filter(punch_out__isnull=True).order_by('-punch_in').first()
+            if open_cycle is None:
+                return None
 
-    def _is_late_entry(self, timestamp, business_hours, entry_type):
-        """Check if entry is late"""
-        if entry_type != 'punch_in' or not business_hours:
-            return False
-        
-        entry_time = timestamp.time()
-        # Convert business_hours.start_time from UTC to Chicago
-        utc_dt = datetime.combine(timestamp.date(), business_hours.start_time).replace(tzinfo=pytz.utc)
-        start_time_chicago = utc_dt.astimezone(CENTRAL_TZ).time()
-        late_threshold = (
-            datetime.combine(timestamp.date(), start_time_chicago) + 
-            timedelta(minutes=business_hours.late_threshold)
-        ).time()
-        return entry_time > late_threshold
-
-    def _is_early_entry(self, timestamp, business_hours, entry_type):
-        """Check if entry is early"""
-        if entry_type != 'punch_out' or not business_hours:
-            return False
-        
-        entry_time = timestamp.time()
-        # Convert business_hours.end_time from UTC to Chicago
-        utc_dt = datetime.combine(timestamp.date(), business_hours.end_time).replace(tzinfo=pytz.utc)
-        end_time_chicago = utc_dt.astimezone(CENTRAL_TZ).time()
-        scheduled_end_dt = datetime.combine(timestamp.date(), end_time_chicago).time()
-        return entry_time < scheduled_end_dt
\ No newline at end of file
+        # Closed totals are summed from the cycles' timestamps and unrounded
+        # break time like compute_session does, the stored hours and minutes
+        # are rounded and would drift a little with every cycle. Breaks of a
+        # well-formed day lie inside their cycle, so working time is simply
+        # duration minus breaks.
+        closed_working_hours = Decimal('0')
+        closed_break_minutes = Decimal('0')
+        for punch_in, punch_out, break_time in cycles.filter(
+            punch_out__isnull=False
+        ).values_list('punch_in', 'punch_out', 'break_time'):
+            cycle_break_minutes = minutes_of(break_time)
+            closed_working_hours += max(
+                Decimal('0'), hours_between(punch_in, punch_out) - (cycle_break_minutes / 60)
+            )
+            closed_break_minutes += cycle_break_minutes
+
+        if time_entry.type == 'break_start':
+            if work_session.break_start is None:
+                work_session.break_start = timestamp
+        elif time_entry.type == 'break_end':
+            # The open break started with the previous entry
+            open_cycle.break_time += timestamp - work_session.last_entry_at
+            open_cycle.break_minutes = minutes_of(open_cycle.break_time)
+            work_session.break_end = timestamp
+        elif time_entry.type == 'punch_out':
+            open_cycle.punch_out = timestamp
+            open_cycle.is_early_out = time_entry.is_early
+            open_cycle.duration_hours = hours_between(open_cycle.punch_in, timestamp)
+            open_break_minutes = minutes_of(open_cycle.break_time)
+            closed_working_hours += max(
+                Decimal('0'), open_cycle.duration_hours - (open_break_minutes / 60)
+            )
+            closed_break_minutes += open_break_minutes
+            work_session.punch_out = timestamp
+            work_session.is_early_out = time_entry.is_early
+
+        now = timezone.now()
+        working_hours, break_minutes = closed_working_hours, closed_break_minutes
+        if new_status != 'complete' and local_date(now) == work_date:
+            working_hours, break_minutes = add_ongoing(
+                working_hours,
+                break_minutes,
+                open_cycle.punch_in,
+                timestamp if new_status == 'on_break' else None,
+                now
+            )
+
+        if work_session.punch_out:
+            work_session.total_hours = hours_between(work_session.punch_in, work_session.punch_out)
+        elif new_status != 'complete':
+            work_session.total_hours = hours_between(work_session.punch_in, now)
+        else:
+            work_session.total_hours = Decimal('0')
+        work_session.working_hours = working_hours
+        work_session.break_duration = break_minutes
+        work_session.status = new_status
+        work_session.last_entry_at = timestamp
+
+        open_cycle.save()
+        work_session.save()
+        return work_session
@@ -1,25 +1,36 @@
-import pytz
 from rest_framework import viewsets, status
 from rest_framework.views import APIView
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db import models
-from django.utils import timezone
-from datetime import datetime, date, time, timedelta
+from django.conf import settings
+from django.db import models, transaction
+from datetime import datetime, date, timedelta
 from .models import TimeEntry, WorkSession, PunchCycle
 from .serializers import (
     TimeEntrySerializer, WorkSessionSerializer, TimeEntryCreateSerializer, 
-    WorkStatusSerializer, PunchCycleSerializer, WorkSessionEditSerializer
+    WorkStatusSerializer, PunchCycleSerializer, WorkSessionEditSerializer,
+    BulkTimeEntryItemSerializer
 )
-from employees.models import Employee, BusinessHours
+from employees.business_hours import get_business_schedule
+from employees.models import Employee
 from .utils import TimeCalculationService
+from .locks import lock_work_day
+from .local_calendar import local_date, local_today
+from .pagination import KeysetPagination
+from .filters import local_date_params, filter_local_timestamps, filter_local_dates
+from .fieldsets import SparseFieldsetMixin
+from .conditional import ConditionalListMixin, conditional_response, list_validators, work_status_validators
+from reports.cache import bump_report_versions_on_commit
+from reports.rollups import sync_daily_rollups
 from django.db.models import Prefetch
 from rest_framework.generics import get_object_or_404
 
-class TimeEntryViewSet(viewsets.ModelViewSet):
+class TimeEntryViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     queryset = TimeEntry.objects.all()
     serializer_class = TimeEntrySerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-timestamp', '-id')
     # permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -30,14 +41,9 @@ class TimeEntryViewSet(viewsets.ModelViewSet):
         if employee_id:
             queryset = queryset.filter(employee_id=employee_id)
         
-        # Filter by date range
-        start_date = self.request.query_params.get('start_date', None)
-        end_date = self.request.query_params.get('end_date', None)
-        
-        if start_date:
-            queryset = queryset.filter(timestamp__date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(timestamp__date__lte=end_date)
+        # Filter by Chicago local date range
+        start_date, end_date = local_date_params(self.request.query_params)
+        queryset = filter_local_timestamps(queryset, start_date, end_date)
         
         # Filter by type
         entry_type = self.request.query_params.get('type', None)
@@ -46,6 +52,27 @@ class TimeEntryViewSet(viewsets.ModelViewSet):
         
         return queryset.order_by('-timestamp')
 
+    # Entries written here bypass punching, so the days they touch are
+    # recomputed in full instead of incrementally
+
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        TimeCalculationService().edit_time_entries(
+            [(data['employee'], local_date(data['timestamp']))], serializer.save
+        )
+
+    def perform_update(self, serializer):
+        data, instance = serializer.validated_data, serializer.instance
+        TimeCalculationService().edit_time_entries([
+            (instance.employee, local_date(instance.timestamp)),
+            (data.get('employee', instance.employee), local_date(data.get('timestamp', instance.timestamp))),
+        ], serializer.save)
+
+    def perform_destroy(self, instance):
+        TimeCalculationService().edit_time_entries(
+            [(instance.employee, local_date(instance.timestamp))], instance.delete
+        )
+
     @action(detail=False, methods=['get'])
     def recent(self, request):
         """Get recent time entries (last 50)"""
@@ -56,14 +83,19 @@ class TimeEntryViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def today(self, request):
         """Get today's time entries for all employees"""
-        today = timezone.now().date()
-        entries = self.get_queryset().filter(timestamp__date=today)
-        serializer = self.get_serializer(entries, many=True)
-        return Response(serializer.data)
+        today = local_today()
+        entries = filter_local_timestamps(self.get_queryset(), today, today)
+        return conditional_response(
+            request, list_validators(request, entries),
+            lambda: Response(self.get_serializer(entries, many=True).data)
+        )
 
-class WorkSessionViewSet(viewsets.ModelViewSet):
+class WorkSessionViewSet(ConditionalListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = WorkSession.objects.all()
     serializer_class = WorkSessionSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-date', '-id')
+    expandable_fields = {'employee': 'employee_data', 'punch_cycles': 'punch_cycles'}
     # permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -79,23 +111,39 @@ class WorkSessionViewSet(viewsets.ModelViewSet):
         if employee_id:
             queryset = queryset.filter(employee_id=employee_id)
         
-        # Filter by date range
-        start_date = self.request.query_params.get('start_date', None)
-        end_date = self.request.query_params.get('end_date', None)
-        
-        CHICAGO_TZ = pytz.timezone('America/Chicago')
-        if start_date:
-            # Convert to Chicago timezone
-            start_local = CHICAGO_TZ.localize(datetime.combine(datetime.strptime(start_date, "%Y-%m-%d"), time.min))
-            start_utc = start_local.astimezone(pytz.UTC)
-            queryset = queryset.filter(date__gte=start_utc)
-        if end_date:
-            end_local = CHICAGO_TZ.localize(datetime.combine(datetime.strptime(end_date, "%Y-%m-%d"), time.max))
-            end_utc = end_local.astimezone(pytz.UTC)
-            queryset = queryset.filter(date__lte=end_utc)
+        # Session dates already are Chicago local dates
+        start_date, end_date = local_date_params(self.request.query_params)
+        queryset = filter_local_dates(queryset, start_date, end_date)
         
         return queryset.order_by('-date')
 
+    def perform_create(self, serializer):
+        self._save_session(serializer)
+
+    def perform_update(self, serializer):
+        previous_date = serializer.instance.date
+        self._save_session(serializer)
+        # A session moved to another day leaves the reports of its old month
+        bump_report_versions_on_commit([previous_date])
+
+    def perform_destroy(self, instance):
+        # The rollup goes with the session, cached reports of its month don't
+        with transaction.atomic():
+            instance.delete()
+            bump_report_versions_on_commit([instance.date])
+
+    def _save_session(self, serializer):
+        """Save a session written through the API, keeping its rollup in step"""
+        data, instance = serializer.validated_data, serializer.instance
+        employee = data['employee'] if 'employee' in data else instance.employee
+        work_date = data['date'] if 'date' in data else instance.date
+        with transaction.atomic():
+            lock_work_day(employee.pk, work_date)
+            # Written values don't follow from the day's entries, so the next
+            # punch recomputes the day instead of building on them
+            work_session = serializer.save(last_entry_at=None)
+            sync_daily_rollups([(work_session, None)])
+
     @action(detail=False, methods=['post'])
     def generate(self, request):
         """Generate work sessions for a date range"""
@@ -108,8 +156,32 @@ class WorkSessionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # 'bulk' recomputes the whole range in batches, 'per_employee' keeps
+        # the original day-by-day recompute
+        mode = request.data.get('mode', 'bulk')
+        if mode not in ('bulk', 'per_employee'):
+            return Response(
+                {'error': "mode must be 'bulk' or 'per_employee'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            batch_size = int(request.data.get('batch_size') or 0) or None
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'batch_size must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         try:
             service = TimeCalculationService()
+            if mode == 'bulk':
+                result = service.bulk_generate_work_sessions(start_date, end_date, batch_size=batch_size)
+                return Response({
+                    'message': f"Generated {result['sessions_count']} work sessions",
+                    **result
+                })
+
             sessions = service.generate_work_sessions(start_date, end_date)
             
             return Response({
@@ -151,8 +223,7 @@ class WorkSessionEditAPIView(APIView):
         work_session.note = note
 
         # Calculate is_late_in and is_early_out using business logic
-        from employees.models import BusinessHours
-        business_hours = BusinessHours.get_current()
+        business_hours = get_business_schedule().business_hours
         # is_late_in
         if business_hours:
             late_threshold = (datetime.combine(punch_in.date(), business_hours.start_time) + timedelta(minutes=business_hours.late_threshold)).time()
@@ -181,7 +252,19 @@ class WorkSessionEditAPIView(APIView):
             work_session.total_hours = Decimal('0.00')
             work_session.working_hours = Decimal('0.00')
 
-        work_session.save()
+        # The edited values don't follow from the entries, so the next punch
+        # has to recompute the day instead of building on them
+        work_session.last_entry_at = None
+
+        # Only write the edited fields, under the employee-day lock, so a
+        # concurrent punch recompute is neither interleaved nor overwritten
+        with transaction.atomic():
+            lock_work_day(work_session.employee_id, work_session.date)
+            work_session.save(update_fields=[
+                'punch_in', 'punch_out', 'note', 'is_late_in', 'is_early_out',
+                'status', 'total_hours', 'working_hours', 'last_entry_at', 'updated_at'
+            ])
+            sync_daily_rollups([(work_session, None)])
         return Response(WorkSessionSerializer(work_session).data)
 
 class TimeTrackingAPIView(APIView):
@@ -224,10 +307,10 @@ class TimeTrackingAPIView(APIView):
         
         try:
             service = TimeCalculationService()
-            work_status = service.get_current_work_status(employee_id)
-            
-            serializer = WorkStatusSerializer(work_status)
-            return Response(serializer.data)
+            return conditional_response(
+                request, work_status_validators(request, employee_id),
+                lambda: Response(WorkStatusSerializer(service.get_current_work_status(employee_id)).data)
+            )
             
         except Employee.DoesNotExist:
             return Response(
@@ -238,4 +321,55 @@ class TimeTrackingAPIView(APIView):
             return Response(
                 {'error': str(e)}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+class BulkPunchAPIView(APIView):
+    """Ingest punches buffered by kiosks and badge readers"""
+    # permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """Record an array of punches, reporting success or failure per item"""
+        items = request.data.get('entries') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'error': 'A non-empty array of entries is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > settings.BULK_PUNCH_MAX_ITEMS:
+            return Response(
+                {'error': f'At most {settings.BULK_PUNCH_MAX_ITEMS} entries can be sent at once'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Validate every item on its own so one bad punch doesn't reject the batch
+        results = [None] * len(items)
+        valid_items, valid_indexes = [], []
+        for index, item in enumerate(items):
+            serializer = BulkTimeEntryItemSerializer(data=item)
+            if serializer.is_valid():
+                valid_items.append(serializer.validated_data)
+                valid_indexes.append(index)
+            else:
+                results[index] = {'index': index, 'success': False, 'errors': serializer.errors}
+
+        try:
+            service = TimeCalculationService()
+            for result in service.create_time_entries_bulk(valid_items):
+                index = valid_indexes[result['index']]
+                result['index'] = index
+                if result['success']:
+                    result['data'] = TimeEntrySerializer(result.pop('entry')).data
+                results[index] = result
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        created = sum(1 for result in results if result['success'])
+        return Response({
+            'message': f'{created} of {len(items)} time entries created',
+            'created': created,
+            'failed': len(items) - created,
+            'results': results
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)